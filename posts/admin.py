@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Group, Post
 
 
@@ -9,6 +10,14 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту идёт через полнотекстовый индекс
+        вместо LIKE '%...%' по всей таблице."""
+        if not search_term.strip() or not search.is_available():
+            return super().get_search_results(
+                request, queryset, search_term)
+        return search.filter_matching(queryset, search_term), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     """Регистрация/создание сообщества
@@ -1,5 +1,32 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def install_search(sender, using, **kwargs):
+    from django.db import connections
+
+    from . import search
+    search.install(connections[using])
+
+
+def reset_pages(sender, **kwargs):
+    # После миграций (и flush в тестах) данные менялись мимо сигналов
+    # моделей. Общий кэш переживает перезапуск процессов, но очищать
+    # его нельзя: в нём сессии. Сдвиг версии сайта делает устаревшими
+    # страницы и фрагменты лент.
+    from .cache import bump_version
+    bump_version('site')
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa
+        from .sqlite import check_version, configure_connection
+        checks.register(check_version)
+        post_migrate.connect(install_search, sender=self)
+        post_migrate.connect(reset_pages, sender=self)
+        connection_created.connect(configure_connection)
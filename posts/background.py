@@ -0,0 +1,42 @@
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+_executors = {}
+_lock = threading.Lock()
+
+
+class SyncExecutor(Executor):
+    """Выполняет задачу сразу в вызывающем потоке. Включается
+    настройкой BACKGROUND_TASKS_SYNC, например в тестах с базой
+    в памяти, где запись из другого потока не ждёт блокировок."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+def _in_worker(fn, *args):
+    try:
+        return fn(*args)
+    finally:
+        # Соединение потока пула не переживает задачу.
+        connection.close()
+
+
+def submit(name, workers, fn, *args):
+    """Ставит fn(*args) в пул потоков name из workers потоков."""
+    if getattr(settings, 'BACKGROUND_TASKS_SYNC', False):
+        return SyncExecutor().submit(fn, *args)
+    with _lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix=name)
+        executor = _executors[name]
+    return executor.submit(_in_worker, fn, *args)
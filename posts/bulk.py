@@ -0,0 +1,65 @@
+from itertools import islice
+
+from django.db import connection, transaction
+
+
+def reserve_ids(model, count):
+    """Выдаёт count новых id таблицы SQLite с AUTOINCREMENT, сдвигая
+    её счётчик в sqlite_sequence. Id удалённых строк повторно
+    не выдаются. Вызывается в транзакции, которая затем вставит
+    строки: после UPDATE она держит блокировку записи, так что
+    параллельные вставки не получат те же id."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s',
+            [count, table]
+        )
+        if not cursor.rowcount:
+            # В таблицу ещё ничего не вставляли.
+            cursor.execute(
+                'INSERT INTO sqlite_sequence (name, seq) '
+                'SELECT %s, COALESCE(MAX({pk}), 0) + %s FROM {table}'.format(
+                    pk=connection.ops.quote_name(model._meta.pk.column),
+                    table=connection.ops.quote_name(table)
+                ),
+                [table, count]
+            )
+        cursor.execute(
+            'SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+        last = cursor.fetchone()[0]
+    return range(last - count + 1, last + 1)
+
+
+def create_with_dates(model, objs, date_fields, batch_size=None, **kwargs):
+    """bulk_create, сохраняющий даты полей auto_now_add, заданные
+    в объектах: INSERT проставляет текущее время, затем заданные даты
+    пишутся одним bulk_update. Объектам нужны id (reserve_ids).
+    Вызывается в транзакции."""
+    dates = [[getattr(obj, name) for name in date_fields] for obj in objs]
+    model.objects.bulk_create(objs, batch_size=batch_size, **kwargs)
+    for obj, values in zip(objs, dates):
+        for name, value in zip(date_fields, values):
+            if value is not None:
+                setattr(obj, name, value)
+    model.objects.bulk_update(objs, date_fields, batch_size=batch_size)
+
+
+def chunked_create(model, objs, batch_size, date_fields=(), **kwargs):
+    """Вставляет объекты из итератора пачками, каждая пачка в своей
+    транзакции. С date_fields даты из объектов сохраняются
+    (create_with_dates). Возвращает число вставленных объектов."""
+    objs = iter(objs)
+    total = 0
+    while True:
+        batch = list(islice(objs, batch_size))
+        if not batch:
+            return total
+        with transaction.atomic():
+            if date_fields:
+                for pk, obj in zip(reserve_ids(model, len(batch)), batch):
+                    obj.pk = pk
+                create_with_dates(model, batch, date_fields, **kwargs)
+            else:
+                model.objects.bulk_create(batch, **kwargs)
+        total += len(batch)
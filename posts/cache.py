@@ -0,0 +1,181 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import background
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'feed_version:{}'
+CHANGED_KEY = 'feed_changed:{}'
+LOCK_KEY = '{}:lock'
+STATS_KEY = 'recompute_stats:{}'
+
+# Сколько держится блокировка пересчёта, если пересчитывающий
+# процесс упал, и сколько без устаревшей копии ждут чужой пересчёт.
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2
+LOCK_POLL = 0.05
+
+RECOMPUTE_STATS = ('recomputes', 'stale', 'contention', 'background')
+
+
+def _initial_version():
+    # После вытеснения ключа версия не должна совпасть ни с одной
+    # из уже использованных, поэтому начинаем с текущего времени.
+    return int(time.time() * 1000)
+
+
+def get_version(scope):
+    """Текущая версия ленты: 'index', 'group:<id>', 'author:<id>',
+    страницы поста 'post:<id>' или всего сайта 'site'."""
+    key = VERSION_KEY.format(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(*scopes, changed=None):
+    """Сдвигает версии лент, закэшированные фрагменты
+    старых версий больше не используются. Время изменения
+    (changed, по умолчанию сейчас) идёт в Last-Modified."""
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+    changed = changed.timestamp() if changed else time.time()
+    cache.set_many(
+        {CHANGED_KEY.format(scope): changed for scope in scopes}, None
+    )
+
+
+def get_freshness(*scopes):
+    """Версии лент и время последнего изменения любой из них
+    за одно обращение к кэшу. Вытесненное время считается
+    текущим: лишний полный ответ лучше устаревшего 304."""
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    changed_keys = [CHANGED_KEY.format(scope) for scope in scopes]
+    values = cache.get_many(keys + changed_keys)
+    versions = [
+        values[key] if key in values else get_version(scope)
+        for key, scope in zip(keys, scopes)
+    ]
+    now = time.time()
+    changed = []
+    for key in changed_keys:
+        if key not in values:
+            cache.add(key, now, None)
+        changed.append(values.get(key, now))
+    return versions, max(changed)
+
+
+def post_scopes(author_id, group_id=None):
+    """Ленты, на которых показывается пост."""
+    scopes = ['index', f'author:{author_id}']
+    if group_id is not None:
+        scopes.append(f'group:{group_id}')
+    return scopes
+
+
+def versions_match(tags):
+    """True, если версии лент {scope: version} всё ещё актуальны."""
+    keys = {VERSION_KEY.format(scope): version
+            for scope, version in tags.items()}
+    current = cache.get_many(list(keys))
+    return all(current.get(key) == version for key, version in keys.items())
+
+
+def feed_cache_options():
+    """Параметры get_or_recompute для лент из настроек FEED_CACHE_*."""
+    return {
+        'timeout': getattr(settings, 'FEED_CACHE_TIMEOUT', 300),
+        'grace': getattr(settings, 'FEED_CACHE_GRACE', 60),
+        'refresh_ahead': getattr(settings, 'FEED_CACHE_REFRESH_AHEAD', 30),
+    }
+
+
+def _count(name):
+    key = STATS_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def recompute_stats():
+    """Сколько раз значения пересчитывались (в том числе в фоне),
+    отдавались устаревшими и сколько запросов ждали чужой пересчёт."""
+    values = cache.get_many([STATS_KEY.format(name)
+                             for name in RECOMPUTE_STATS])
+    return {name: values.get(STATS_KEY.format(name), 0)
+            for name in RECOMPUTE_STATS}
+
+
+def _store(key, compute, version, timeout, grace):
+    value = compute()
+    cache.set(key, {
+        'value': value,
+        'version': version,
+        'fresh_until': time.time() + timeout,
+    }, timeout + grace)
+    _count('recomputes')
+    return value
+
+
+def _refresh(key, compute, version, timeout, grace):
+    try:
+        _store(key, compute, version, timeout, grace)
+    except Exception:
+        logger.exception('Не удалось пересчитать %s', key)
+    finally:
+        cache.delete(LOCK_KEY.format(key))
+
+
+def get_or_recompute(key, compute, timeout, version=None, grace=0,
+                     refresh_ahead=0):
+    """Значение из кэша с единственным пересчётом.
+
+    Устаревшее значение (истёк timeout или сменилась version)
+    пересчитывает только запрос, взявший блокировку, остальные
+    ещё grace секунд отдают старую копию. Без копии они ждут
+    чужой пересчёт до LOCK_WAIT секунд. За refresh_ahead секунд
+    до истечения значение пересчитывается в фоне; compute тогда
+    не должен зависеть от запроса.
+    Возвращает пару (значение, свежее ли оно).
+    """
+    now = time.time()
+    entry = cache.get(key)
+    lock = LOCK_KEY.format(key)
+    if entry is not None and entry['version'] == version:
+        if now < entry['fresh_until'] - refresh_ahead:
+            return entry['value'], True
+        if now < entry['fresh_until']:
+            if cache.add(lock, 1, LOCK_TIMEOUT):
+                _count('background')
+                background.submit('recompute', 1, _refresh,
+                                  key, compute, version, timeout, grace)
+            return entry['value'], True
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            return _store(key, compute, version, timeout, grace), True
+        finally:
+            cache.delete(lock)
+    if entry is not None:
+        _count('stale')
+        return entry['value'], False
+    _count('contention')
+    deadline = now + LOCK_WAIT
+    while time.time() < deadline and cache.get(lock) is not None:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None and entry['version'] == version:
+            return entry['value'], True
+    # Пересчёт не дождались: считаем сами, но не записываем.
+    return compute(), True
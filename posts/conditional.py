@@ -0,0 +1,66 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_freshness
+
+
+class Freshness:
+    """ETag и Last-Modified страницы по версиям её лент в кэше,
+    без рендеринга и без запросов к базе.
+
+    Страница авторизованного пользователя отличается кнопками,
+    формами и CSRF-токеном, поэтому в ETag входят куки сессии и CSRF,
+    а Last-Modified отдаётся только гостям: по одной дате нельзя
+    отличить вход другого пользователя.
+    """
+
+    def __init__(self, request, *scopes):
+        self.request = request
+        # Общая версия сайта сдвигается после миграций.
+        scopes = ('site',) + scopes
+        versions, changed = get_freshness(*scopes)
+        session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        raw = '|'.join(map(str, [
+            request.path,
+            request.GET.urlencode(),
+            *scopes,
+            *versions,
+            session or '',
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        ]))
+        self.etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        self.last_modified = None if session else int(changed)
+        # Теги для PageCacheMiddleware: ответ устаревает вместе с лентами.
+        request.page_cache_tags = dict(zip(scopes, versions))
+        # Версии для кэша лент, в каждую входит версия сайта.
+        site = versions[0]
+        self.versions = {
+            scope: f'{site}.{version}'
+            for scope, version in zip(scopes[1:], versions[1:])
+        }
+
+    def not_modified(self):
+        """Ответ 304 (или 412), если копия клиента ещё свежая, иначе None."""
+        if self.request.method not in ('GET', 'HEAD'):
+            return None
+        response = get_conditional_response(
+            self.request,
+            etag=self.etag,
+            last_modified=self.last_modified
+        )
+        return response and self.apply(response)
+
+    def apply(self, response):
+        # Страница собрана из устаревшей копии ленты (get_or_recompute):
+        # без валидаторов клиент не закрепит её через 304.
+        if getattr(self.request, 'served_stale', False):
+            return response
+        if response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            if self.last_modified is not None:
+                response['Last-Modified'] = http_date(self.last_modified)
+            patch_vary_headers(response, ('Cookie',))
+        return response
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+def _shifted(field, delta):
+    # Разошедшийся с данными счётчик не уходит ниже нуля:
+    # поля PositiveIntegerField, отрицательное значение — IntegrityError.
+    return Greatest(F(field) + delta, 0)
+
+
+def change_stats(user_id, **deltas):
+    """Атомарно сдвигает счётчики пользователя на заданные величины."""
+    changes = {field: _shifted(field, delta)
+               for field, delta in deltas.items()}
+    if UserStats.objects.filter(user_id=user_id).update(**changes):
+        return
+    if all(delta < 0 for delta in deltas.values()):
+        # Строки нет, например, пользователь удаляется каскадом.
+        return
+    UserStats.objects.get_or_create(user_id=user_id)
+    UserStats.objects.filter(user_id=user_id).update(**changes)
+
+
+def change_comment_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=_shifted('comment_count', delta)
+    )
+
+
+def stats_for(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        stats, _ = UserStats.objects.get_or_create(user=user)
+        return stats
+
+
+def _count(model, field, outer='pk'):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def recount():
+    """Пересчитывает все счётчики одним UPDATE на таблицу."""
+    with transaction.atomic():
+        UserStats.objects.bulk_create(
+            (UserStats(user_id=pk) for pk in User.objects.filter(
+                stats__isnull=True).values_list('pk', flat=True)),
+            ignore_conflicts=True
+        )
+        Post.objects.update(comment_count=_count(Comment, 'post'))
+        UserStats.objects.update(
+            post_count=_count(Post, 'author', 'user_id'),
+            follower_count=_count(Follow, 'author', 'user_id'),
+            following_count=_count(Follow, 'user', 'user_id'),
+        )
@@ -0,0 +1,162 @@
+import csv
+import json
+import zipfile
+
+from django.core.files.storage import default_storage
+
+from .models import Comment, Post
+
+# Строк за одно обращение к курсору и байт в одном куске ответа.
+CHUNK_SIZE = 500
+CHUNK_BYTES = 64 * 1024
+
+POST_FIELDS = ('id', 'pub_date', 'group', 'image', 'text')
+COMMENT_FIELDS = ('id', 'post', 'created', 'text')
+CSV_FIELDS = ('type', 'id', 'post', 'date', 'group', 'image', 'text')
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'zip': 'application/zip',
+}
+
+
+def post_rows(user):
+    """Посты пользователя словарями, без загрузки всех сразу."""
+    for row in Post.objects.filter(author=user).order_by('pk').values_list(
+        'id', 'pub_date', 'group__slug', 'image', 'text'
+    ).iterator(chunk_size=CHUNK_SIZE):
+        record = dict(zip(POST_FIELDS, row))
+        record['pub_date'] = record['pub_date'].isoformat()
+        yield record
+
+
+def comment_rows(user):
+    for row in Comment.objects.filter(author=user).order_by(
+        'pk'
+    ).values_list(
+        'id', 'post_id', 'created', 'text'
+    ).iterator(chunk_size=CHUNK_SIZE):
+        record = dict(zip(COMMENT_FIELDS, row))
+        record['created'] = record['created'].isoformat()
+        yield record
+
+
+def _buffered(pieces):
+    """Склеивает мелкие строки в куски по CHUNK_BYTES."""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False).encode() + b'\n'
+
+
+def ndjson(user):
+    """Посты, затем комментарии: по JSON-объекту с полем type
+    на строку."""
+    def records():
+        for record in post_rows(user):
+            yield {'type': 'post', **record}
+        for record in comment_rows(user):
+            yield {'type': 'comment', **record}
+    return _buffered(_ndjson_lines(records()))
+
+
+class _Echo:
+    """Файл для csv.writer, который возвращает записанное."""
+
+    def write(self, value):
+        return value
+
+
+def csv_rows(user):
+    writer = csv.DictWriter(_Echo(), CSV_FIELDS, extrasaction='ignore')
+
+    def lines():
+        # BOM, чтобы Excel открыл кириллицу без настройки кодировки.
+        yield '\ufeff' + writer.writeheader()
+        for record in post_rows(user):
+            record['date'] = record.pop('pub_date')
+            yield writer.writerow({'type': 'post', **record})
+        for record in comment_rows(user):
+            record['date'] = record.pop('created')
+            yield writer.writerow({'type': 'comment', **record})
+    return _buffered(line.encode() for line in lines())
+
+
+class _ZipStream:
+    """Поток без seek для zipfile: записанное забирается методом
+    pop и сразу уходит клиенту."""
+
+    def __init__(self):
+        self.buffer = []
+
+    def write(self, data):
+        self.buffer.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.buffer)
+        self.buffer = []
+        return data
+
+    def drain(self):
+        """Итератор из накопленного куска, если он есть."""
+        data = self.pop()
+        if data:
+            yield data
+
+
+def _image_names(user):
+    return Post.objects.filter(author=user).exclude(image='').order_by(
+        'image'
+    ).values_list('image', flat=True).distinct().iterator(
+        chunk_size=CHUNK_SIZE
+    )
+
+
+def zip_archive(user):
+    """ZIP с posts.ndjson, comments.ndjson и файлами картинок.
+    Архив пишется по кускам, в памяти не больше одного куска."""
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w') as archive:
+        for name, rows in (('posts.ndjson', post_rows(user)),
+                           ('comments.ndjson', comment_rows(user))):
+            info = zipfile.ZipInfo(name)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in _buffered(_ndjson_lines(rows)):
+                    entry.write(chunk)
+                    yield from stream.drain()
+        for name in _image_names(user):
+            if not default_storage.exists(name):
+                continue
+            # Картинки уже сжаты, deflate только потратил бы время.
+            info = zipfile.ZipInfo(name)
+            with default_storage.open(name) as source, archive.open(
+                info, 'w', force_zip64=True
+            ) as entry:
+                for chunk in source.chunks(CHUNK_BYTES):
+                    entry.write(chunk)
+                    yield from stream.drain()
+    yield from stream.drain()
+
+
+WRITERS = {'ndjson': ndjson, 'csv': csv_rows, 'zip': zip_archive}
+
+
+def export(user, export_format):
+    """Итератор байтов выгрузки в формате из FORMATS."""
+    return WRITERS[export_format](user)
@@ -0,0 +1,88 @@
+from django.db import connection, transaction
+
+from . import counters, timeline
+from .cache import bump_version
+from .models import UserStats
+
+FOLLOW_SQL = (
+    'INSERT INTO posts_follow (user_id, author_id) VALUES {values} '
+    'ON CONFLICT (user_id, author_id) DO NOTHING RETURNING author_id'
+)
+UNFOLLOW_SQL = (
+    'DELETE FROM posts_follow WHERE user_id = %s AND author_id IN ({marks}) '
+    'RETURNING author_id'
+)
+
+
+def followed(user_id, author_ids):
+    """Счётчики, ленты и версии кэша после новых подписок.
+    Вызывается и из сигнала post_save модели Follow."""
+    if not author_ids:
+        return
+    counters.change_stats(user_id, following_count=len(author_ids))
+    for author_id in author_ids:
+        counters.change_stats(author_id, follower_count=1)
+        timeline.backfill(user_id, author_id)
+    # Счётчики и кнопка подписки на страницах обоих профилей.
+    bump_version(
+        f'author:{user_id}',
+        *(f'author:{author_id}' for author_id in author_ids)
+    )
+
+
+def unfollowed(user_id, author_ids):
+    if not author_ids:
+        return
+    counters.change_stats(user_id, following_count=-len(author_ids))
+    for author_id in author_ids:
+        counters.change_stats(author_id, follower_count=-1)
+        timeline.prune(user_id, author_id)
+    timeline.followers_lost(author_ids)
+    bump_version(
+        f'author:{user_id}',
+        *(f'author:{author_id}' for author_id in author_ids)
+    )
+
+
+def follow(user, author_ids):
+    """Подписывает пользователя на авторов одной вставкой, уже
+    существующие подписки и подписка на себя пропускаются.
+    Возвращает id авторов, подписка на которых действительно создана."""
+    author_ids = {pk for pk in author_ids if pk != user.pk}
+    if not author_ids:
+        return []
+    values = ', '.join(['(%s, %s)'] * len(author_ids))
+    params = [value for pk in author_ids for value in (user.pk, pk)]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(FOLLOW_SQL.format(values=values), params)
+            created = [row[0] for row in cursor.fetchall()]
+        followed(user.pk, created)
+    return created
+
+
+def unfollow(user, author_ids):
+    """Удаляет подписки одним DELETE. Возвращает id авторов,
+    подписка на которых была."""
+    author_ids = list(author_ids)
+    if not author_ids:
+        return []
+    marks = ', '.join(['%s'] * len(author_ids))
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                UNFOLLOW_SQL.format(marks=marks), [user.pk, *author_ids])
+            deleted = [row[0] for row in cursor.fetchall()]
+        unfollowed(user.pk, deleted)
+    return deleted
+
+
+def follow_counts(*user_ids):
+    """Число подписчиков и подписок пользователей одним запросом:
+    id -> {'followers': ..., 'follows': ...}."""
+    return {
+        user_id: {'followers': followers, 'follows': follows}
+        for user_id, followers, follows in UserStats.objects.filter(
+            user_id__in=user_ids
+        ).values_list('user_id', 'follower_count', 'following_count')
+    }
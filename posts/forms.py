@@ -1,5 +1,6 @@
 from django import forms
 
+from . import images
 from .models import Comment, Post
 
 
@@ -9,6 +10,12 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('group', 'text', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if image and hasattr(image, 'content_type'):
+            images.validate(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     """Класс для написания комментариев к постам."""
@@ -0,0 +1,154 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, PngImagePlugin
+
+logger = logging.getLogger(__name__)
+
+
+def _limit(name, default):
+    return getattr(settings, name, default)
+
+
+def validate(file):
+    """Проверяет размер файла и число пикселей по заголовку картинки,
+    не декодируя её целиком."""
+    max_bytes = _limit('POST_IMAGE_MAX_BYTES', 20 * 1024 * 1024)
+    if file.size > max_bytes:
+        raise ValidationError(
+            'Файл слишком большой, максимум %(size)s МБ.',
+            params={'size': max_bytes // (1024 * 1024)}
+        )
+    file.seek(0)
+    try:
+        width, height = Image.open(file).size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Не удалось прочитать картинку.')
+    finally:
+        file.seek(0)
+    if width * height > _limit('POST_IMAGE_MAX_PIXELS', 50_000_000):
+        raise ValidationError('Слишком большое разрешение картинки.')
+
+
+# Отметка в теге Software (EXIF для JPEG, текст для PNG): файл уже
+# нормализован, повторный проход normalize_images его не пережимает.
+MARKER = 'yatube-normalized'
+SOFTWARE_TAG = 0x0131
+
+
+def _is_normalized(image):
+    return (image.info.get('Software') == MARKER
+            or image.getexif().get(SOFTWARE_TAG) == MARKER)
+
+
+def _has_metadata(image):
+    """EXIF, XMP, IPTC, комментарии и текстовые поля: в них бывают
+    координаты съёмки, модель камеры и имя автора."""
+    if 'exif' in image.info:
+        return True
+    segments = {marker for marker, _ in getattr(image, 'applist', [])}
+    if segments & {'APP1', 'APP13', 'COM'}:
+        return True
+    return bool(getattr(image, 'text', None))
+
+
+def normalize(file):
+    """Поворачивает картинку по EXIF, уменьшает до POST_IMAGE_MAX_EDGE
+    и пережимает с POST_IMAGE_QUALITY без метаданных. Возвращает
+    ContentFile или None, если файл лучше оставить как есть: он уже
+    нормализован, не читается или без метаданных и пережатие его
+    не уменьшает."""
+    file.seek(0)
+    original = file.read()
+    file.seek(0)
+    try:
+        return _normalize(original, file.name)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning('Не удалось нормализовать картинку %s', file.name,
+                       exc_info=True)
+        return None
+
+
+def _normalize(original, file_name):
+    max_edge = _limit('POST_IMAGE_MAX_EDGE', 1920)
+    image = Image.open(BytesIO(original))
+    if getattr(image, 'is_animated', False) or _is_normalized(image):
+        return None
+    source_size = image.size
+    has_metadata = _has_metadata(image)
+    # Для JPEG декодер сразу уменьшает картинку кратно степени двойки,
+    # не разворачивая в памяти оригинал целиком.
+    image.draft('RGB', (max_edge, max_edge))
+    orientation = image.getexif().get(0x0112, 1)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    changed = (orientation != 1 or image.size != source_size
+               or has_metadata)
+
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        marker = PngImagePlugin.PngInfo()
+        marker.add_text('Software', MARKER)
+        image_format, extension, options = 'PNG', 'png', {
+            'optimize': True,
+            'pnginfo': marker,
+        }
+    else:
+        image = image.convert('RGB')
+        marker = Image.Exif()
+        marker[SOFTWARE_TAG] = MARKER
+        image_format, extension, options = 'JPEG', 'jpg', {
+            'quality': _limit('POST_IMAGE_QUALITY', 85),
+            'optimize': True,
+            'progressive': True,
+            'exif': marker.tobytes(),
+        }
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    data = buffer.getvalue()
+    if not changed and len(data) >= len(original):
+        return None
+
+    name = os.path.splitext(os.path.basename(file_name))[0]
+    logger.info(
+        'Картинка %s: %s -> %s байт, сэкономлено %s',
+        file_name, len(original), len(data), len(original) - len(data)
+    )
+    return ContentFile(data, name=f'{name}.{extension}')
+
+
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+}
+
+
+def make_variants(file):
+    """Нарезает картинку карточки (кадр POST_IMAGE_VARIANT_RATIO
+    по центру) во всех ширинах и форматах для srcset.
+    Возвращает список (ширина, высота, формат, ContentFile)."""
+    ratio_width, ratio_height = _limit('POST_IMAGE_VARIANT_RATIO', (960, 339))
+    widths = sorted(_limit('POST_IMAGE_VARIANT_WIDTHS', (320, 640, 960)))
+    formats = _limit('POST_IMAGE_VARIANT_FORMATS', ('webp', 'jpeg'))
+    quality = _limit('POST_IMAGE_QUALITY', 85)
+    file.seek(0)
+    with Image.open(file) as source:
+        image = ImageOps.exif_transpose(source).convert('RGB')
+    # Шире оригинала не растягиваем, но самая узкая копия есть всегда.
+    widths = [w for w in widths if w <= image.width] or widths[:1]
+    name = os.path.splitext(os.path.basename(file.name))[0]
+    variants = []
+    for width in widths:
+        height = round(width * ratio_height / ratio_width)
+        resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        for variant_format in formats:
+            image_format, extension, _ = VARIANT_FORMATS[variant_format]
+            buffer = BytesIO()
+            resized.save(buffer, image_format, quality=quality)
+            variants.append((width, height, variant_format, ContentFile(
+                buffer.getvalue(), name=f'{name}-{width}.{extension}'
+            )))
+    return variants
@@ -0,0 +1,70 @@
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.module_loading import import_string
+
+from .middleware import current, timed
+
+_MISSING = object()
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed('template_time'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, который прибавляет время рендеринга
+    к метрикам запроса (PerformanceMiddleware). Через бэкенд проходят
+    только шаблоны верхнего уровня: include и inclusion-теги берут
+    шаблоны у движка и уже учтены во внешнем."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class InstrumentedCache:
+    """Обёртка над бэкендом кэша, которая считает попадания и промахи
+    в метриках запроса. Настоящий бэкенд задаётся в OPTIONS['BACKEND'],
+    остальные параметры передаются ему как есть:
+
+        CACHES = {'default': {
+            'BACKEND': 'posts.instrumentation.InstrumentedCache',
+            'LOCATION': '/srv/yatube/cache.sqlite3',
+            'OPTIONS': {'BACKEND': 'yatube.cache.SQLiteCache'},
+        }}
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        backend = import_string(options.pop('BACKEND'))
+        self.cache = backend(location, dict(params, OPTIONS=options))
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+    def __contains__(self, key):
+        return key in self.cache
+
+    def get(self, key, default=None, version=None):
+        value = self.cache.get(key, _MISSING, version=version)
+        metrics = current()
+        if value is _MISSING:
+            if metrics is not None:
+                metrics.cache_misses += 1
+            return default
+        if metrics is not None:
+            metrics.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.cache.get_many(keys, version=version)
+        metrics = current()
+        if metrics is not None:
+            metrics.cache_hits += len(found)
+            metrics.cache_misses += len(keys) - len(found)
+        return found
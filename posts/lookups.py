@@ -0,0 +1,56 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import Group
+
+User = get_user_model()
+
+# Отметка в кэше для несуществующего объекта.
+MISSING = 'missing'
+
+
+def _key(kind, value):
+    digest = hashlib.md5(str(value).encode()).hexdigest()
+    return f'object:{kind}:{digest}'
+
+
+def user_key(username):
+    return _key('user', username)
+
+
+def group_key(slug):
+    return _key('group', slug)
+
+
+def _cached_or_404(key, queryset, **lookup):
+    value = cache.get(key)
+    if value is None:
+        value = queryset.filter(**lookup).first()
+        if value is None:
+            value = MISSING
+            cache.set(key, value, getattr(
+                settings, 'OBJECT_CACHE_MISS_TIMEOUT', 60))
+        else:
+            cache.set(key, value, getattr(
+                settings, 'OBJECT_CACHE_TIMEOUT', 600))
+    if value == MISSING:
+        raise Http404(f'No {queryset.model._meta.object_name} matches '
+                      f'the given query.')
+    return value
+
+
+def user_or_404(username):
+    """Пользователь по username через кэш. Отсутствующие имена тоже
+    кэшируются на OBJECT_CACHE_MISS_TIMEOUT секунд, запись сбрасывается
+    сигналами при сохранении и удалении пользователя."""
+    return _cached_or_404(
+        user_key(username), User.objects.order_by(), username=username)
+
+
+def group_or_404(slug):
+    """Группа по slug через кэш, как user_or_404."""
+    return _cached_or_404(group_key(slug), Group.objects.order_by(), slug=slug)
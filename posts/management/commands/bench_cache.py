@@ -0,0 +1,95 @@
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from yatube.cache import SQLiteCache
+
+
+def _backends(directory):
+    params = {'TIMEOUT': None, 'OPTIONS': {'MAX_ENTRIES': 100000}}
+    return {
+        'locmem': lambda: LocMemCache('bench', params),
+        'filebased': lambda: FileBasedCache(
+            os.path.join(directory, 'files'), params),
+        'sqlite': lambda: SQLiteCache(
+            os.path.join(directory, 'cache.sqlite3'), params),
+    }
+
+
+def _rate(operation, count):
+    started = time.perf_counter()
+    for i in range(count):
+        operation(i)
+    return round(count / (time.perf_counter() - started))
+
+
+def _worker(args):
+    # Процесс сервера: читает популярные ключи и кладёт в кэш
+    # при промахе, как {% cache %} в шаблонах.
+    name, directory, keys, requests, seed = args
+    cache = _backends(directory)[name]()
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(keys)]
+    hits = 0
+    for key in rng.choices(range(keys), weights, k=requests):
+        if cache.get(f'page:{key}') is None:
+            cache.set(f'page:{key}', 'x' * 2048)
+        else:
+            hits += 1
+    return hits
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает LocMemCache, FileBasedCache и SQLiteCache: '
+            'операций в секунду в одном процессе и долю попаданий, '
+            'когда страницы читают несколько процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ops', type=int, default=5000)
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--keys', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        ops = options['ops']
+        report = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, factory in _backends(directory).items():
+                cache = factory()
+                value = {'text': 'x' * 1024}
+                report[name] = {
+                    'set_per_s': _rate(
+                        lambda i: cache.set(f'k{i}', value), ops),
+                    'get_hit_per_s': _rate(
+                        lambda i: cache.get(f'k{i}'), ops),
+                    'get_miss_per_s': _rate(
+                        lambda i: cache.get(f'miss{i}'), ops),
+                    'get_many_10_per_s': _rate(
+                        lambda i: cache.get_many(
+                            [f'k{i + j}' for j in range(10)]), ops // 10),
+                    'incr_per_s': _rate(
+                        lambda i: cache.incr('k0') if i else cache.set(
+                            'k0', 0), ops),
+                    'hit_rate': self.shared_hit_rate(
+                        name, directory, options),
+                }
+                cache.clear()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    @staticmethod
+    def shared_hit_rate(name, directory, options):
+        context = multiprocessing.get_context('fork')
+        processes = options['processes']
+        with context.Pool(processes) as pool:
+            hits = pool.map(_worker, [
+                (name, directory, options['keys'], options['requests'], seed)
+                for seed in range(processes)
+            ])
+        return round(sum(hits) / (processes * options['requests']), 3)
@@ -0,0 +1,53 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+from posts.models import Post
+
+PER_PAGE = 12
+
+
+def _timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает полнотекстовый поиск с LIKE на текущей базе. '
+            'Для замеров на миллионе постов сначала заполните базу '
+            'через seed_bench.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=['пост', 'текст'])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        report = {'posts': Post.objects.count(), 'queries': {}}
+        for query in options['queries']:
+            def fts():
+                results = search.SearchResults(query)
+                results.count()
+                results[:PER_PAGE]
+
+            def like():
+                results = Post.objects.filter(text__icontains=query)
+                results.count()
+                list(results[:PER_PAGE])
+
+            report['queries'][query] = {
+                'fts': _timed(fts, options['repeat']),
+                'like': _timed(like, options['repeat']),
+            }
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
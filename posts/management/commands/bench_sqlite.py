@@ -0,0 +1,130 @@
+import json
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.test.utils import override_settings
+
+from posts import sqlite
+from posts.models import Comment, Post
+
+from .bench_views import percentile
+
+MARKER = 'bench_sqlite'
+
+# До: журнал отката, настройки по умолчанию и новое соединение
+# на каждую операцию, как с CONN_MAX_AGE = 0.
+PROFILES = {
+    'baseline': ({'journal_mode': 'DELETE'}, False),
+    'tuned': (None, True),
+}
+
+
+class Worker(threading.Thread):
+    def __init__(self, operation, deadline, reuse):
+        super().__init__()
+        self.operation = operation
+        self.deadline = deadline
+        self.reuse = reuse
+        self.timings = []
+        self.errors = 0
+
+    def run(self):
+        try:
+            while time.perf_counter() < self.deadline:
+                started = time.perf_counter()
+                try:
+                    self.operation()
+                except OperationalError:
+                    self.errors += 1
+                else:
+                    self.timings.append(time.perf_counter() - started)
+                if not self.reuse:
+                    connection.close()
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Нагружает базу параллельными читателями (первая страница '
+            'ленты) и писателями (комментарии) и сравнивает пропускную '
+            'способность без настроек SQLite и с SQLITE_PRAGMAS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument(
+            '--profile', action='append', choices=sorted(PROFILES),
+            help='Какие профили замерять (по умолчанию оба)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда замеряет только SQLite')
+        post_ids = list(Post.objects.values_list('pk', 'author_id')[:1000])
+        if not post_ids:
+            raise CommandError('Сначала заполните базу: manage.py seed_bench')
+
+        def read():
+            list(Post.objects.select_related('author', 'group').order_by(
+                '-pub_date', '-pk')[:12])
+
+        def write():
+            post_id, author_id = random.choice(post_ids)
+            with transaction.atomic():
+                Comment.objects.create(
+                    post_id=post_id, author_id=author_id, text=MARKER)
+
+        report = {}
+        try:
+            for name in options['profile'] or ['baseline', 'tuned']:
+                pragmas, reuse = PROFILES[name]
+                pragmas = dict(sqlite.pragmas() if pragmas is None
+                               else pragmas)
+                # Режим журнала хранится в файле базы, а сменить его
+                # можно только без других соединений, поэтому он
+                # выставляется один раз до запуска потоков.
+                mode = pragmas.pop('journal_mode', 'DELETE')
+                connection.close()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'PRAGMA journal_mode = {mode}')
+                connection.close()
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    report[name] = self.run_profile(
+                        read, write, reuse, options)
+                    report[name]['journal_mode'] = sqlite.journal_mode(
+                        connection)
+                connection.close()
+        finally:
+            Comment.objects.filter(text=MARKER).delete()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run_profile(self, read, write, reuse, options):
+        deadline = time.perf_counter() + options['duration']
+        readers = [
+            Worker(read, deadline, reuse) for _ in range(options['readers'])
+        ]
+        writers = [
+            Worker(write, deadline, reuse) for _ in range(options['writers'])
+        ]
+        for worker in readers + writers:
+            worker.start()
+        for worker in readers + writers:
+            worker.join()
+        return {
+            'reads_per_s': self.summary(readers, options['duration']),
+            'writes_per_s': self.summary(writers, options['duration']),
+        }
+
+    @staticmethod
+    def summary(workers, duration):
+        timings = [t for worker in workers for t in worker.timings]
+        return {
+            'ops': round(len(timings) / duration, 1),
+            'errors': sum(worker.errors for worker in workers),
+            'p95_ms': round(percentile(timings, 95) * 1000, 2)
+            if timings else None,
+        }
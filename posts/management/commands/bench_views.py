@@ -0,0 +1,109 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from posts.pagination import encode_cursor
+from posts.views import POSTS_PER_PAGE
+
+User = get_user_model()
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = ('Замеряет страницы постов через тестовый клиент и выводит '
+            'p50/p95/p99, число запросов и размер ответа в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом'
+        )
+        parser.add_argument('--label', default='')
+        parser.add_argument('--output', help='Файл для JSON-отчёта')
+
+    def targets(self):
+        # Самый популярный автор и его подписчик дают самые тяжёлые
+        # страницы профиля и ленты подписок.
+        author = User.objects.order_by('-stats__follower_count').first()
+        reader = User.objects.filter(
+            follower__author=author).first() or author
+        post = Post.objects.filter(author=author).first()
+        group = Group.objects.order_by('-posts__pub_date').first()
+        if author is None or post is None or group is None:
+            raise CommandError('Сначала заполните базу: manage.py seed_bench')
+        guest = Client()
+        reader_client = Client()
+        reader_client.force_login(reader)
+        author_client = Client()
+        author_client.force_login(author)
+        deep_cursor = encode_cursor(
+            Post.objects.order_by('-pub_date', '-pk')[POSTS_PER_PAGE - 1])
+        return {
+            'index': (guest, reverse('index')),
+            'index_next': (guest, f"{reverse('index')}?after={deep_cursor}"),
+            'index_page_50': (guest, f"{reverse('index')}?page=50"),
+            'group': (guest, reverse('group', args=[group.slug])),
+            'profile': (guest, reverse('profile', args=[author.username])),
+            'post': (guest, reverse('post', args=[author.username, post.pk])),
+            'follow_index': (reader_client, reverse('follow_index')),
+            'post_edit': (author_client, reverse(
+                'post_edit', args=[author.username, post.pk])),
+        }
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+        timings, queries, sizes = [], [], []
+        for _ in range(options['requests']):
+            if options['cold']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            queries.append(len(captured.captured_queries))
+            sizes.append(len(response.content))
+        return {
+            'url': url,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'queries': statistics.median(queries),
+            'bytes': statistics.median(sizes),
+        }
+
+    def handle(self, *args, **options):
+        report = {
+            'label': options['label'],
+            'cold_cache': options['cold'],
+            'requests': options['requests'],
+            'posts': Post.objects.count(),
+            'users': User.objects.count(),
+            'follows': Follow.objects.count(),
+            'views': {},
+        }
+        for name, (client, url) in self.targets().items():
+            report['views'][name] = self.measure(client, url, options)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,18 @@
+import json
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posts.cache import recompute_stats
+
+
+class Command(BaseCommand):
+    help = ('Показывает счётчики кэша: попадания и вытеснения бэкенда, '
+            'пересчёты лент, отданные устаревшие копии и ожидания '
+            'чужого пересчёта.')
+
+    def handle(self, *args, **options):
+        report = {'recompute': recompute_stats()}
+        if hasattr(cache, 'stats'):
+            report['backend'] = cache.stats()
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,38 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты и комментарии пользователя в NDJSON, CSV '
+            'или ZIP с картинками. Данные читаются и пишутся по частям.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--format', choices=sorted(export.FORMATS), default='ndjson')
+        parser.add_argument(
+            '--output', help='Файл выгрузки, по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден')
+        chunks = export.export(user, options['format'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            return
+        if options['format'] == 'zip' and sys.stdout.isatty():
+            raise CommandError('Для zip укажите --output')
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
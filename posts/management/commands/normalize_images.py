@@ -0,0 +1,60 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from posts import images
+from posts.cache import bump_version, post_scopes
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пережимает уже загруженные картинки постов пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--delete-originals', action='store_true',
+            help='Удалять исходные файлы после замены'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать экономию, ничего не сохранять'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = Post.objects.exclude(image='').exclude(
+            image__isnull=True).order_by('pk')
+        last_pk = 0
+        processed = saved_bytes = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk).values_list(
+                'pk', 'image', 'author_id', 'group_id')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            for pk, name, author_id, group_id in batch:
+                if not default_storage.exists(name):
+                    continue
+                with default_storage.open(name) as file:
+                    original_size = file.size
+                    normalized = images.normalize(file)
+                processed += 1
+                if normalized is None:
+                    continue
+                saved_bytes += original_size - normalized.size
+                if options['dry_run']:
+                    continue
+                new_name = default_storage.save(
+                    Post._meta.get_field('image').generate_filename(
+                        None, normalized.name),
+                    normalized
+                )
+                Post.objects.filter(pk=pk).update(image=new_name)
+                bump_version(f'post:{pk}', *post_scopes(author_id, group_id))
+                if (options['delete_originals']
+                        and not Post.objects.filter(image=name).exists()):
+                    default_storage.delete(name)
+            self.stdout.write(f'Обработано картинок: {processed}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {processed} картинок, сэкономлено {saved_bytes} байт'
+        ))
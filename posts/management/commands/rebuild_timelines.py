@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Пользователи, чьи ленты нужно пересобрать (по умолчанию все)'
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        created = timeline.rebuild(users)
+        self.stdout.write(
+            self.style.SUCCESS(f'Записей в лентах: {created}')
+        )
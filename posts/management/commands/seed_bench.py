@@ -0,0 +1,164 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from PIL import Image
+
+from posts import counters, search, timeline
+from posts.bulk import chunked_create
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+WORDS = (
+    'яндекс питон джанго пост лента кот собака море город код '
+    'тест данные вечер утро книга музыка фильм дорога работа отпуск'
+).split()
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными для замеров: '
+            'пользователи, группы, посты, комментарии и подписки '
+            'со степенным распределением популярности авторов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows', type=int, default=50,
+            help='Среднее число подписок на пользователя'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.2,
+            help='Показатель степенного закона популярности авторов'
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help='Доля постов с картинкой (0..1)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.chunk = options['chunk_size']
+        prefix = options['prefix']
+
+        users = self.seed_users(prefix, options['users'])
+        groups = self.seed_groups(prefix, options['groups'])
+        images = self.seed_images(prefix) if options['images'] else []
+        self.seed_posts(users, groups, images, options)
+        posts = list(Post.objects.filter(
+            author__in=users).values_list('pk', flat=True))
+        self.seed_comments(users, posts, options['comments'])
+        self.seed_follows(users, options['follows'], options['alpha'])
+
+        self.stdout.write('Пересчёт счётчиков, лент и индекса поиска')
+        counters.recount()
+        timeline.rebuild(User.objects.filter(pk__in=users))
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Готово'))
+
+    def seed_users(self, prefix, count):
+        password = make_password(prefix)
+        created = chunked_create(User, (
+            User(username=f'{prefix}_{i}', password=password)
+            for i in range(count)
+        ), self.chunk, ignore_conflicts=True)
+        self.stdout.write(f'Пользователей: {created}')
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_').values_list('pk', flat=True))
+
+    def seed_groups(self, prefix, count):
+        chunked_create(Group, (
+            Group(
+                title=f'Группа {i}',
+                slug=f'{prefix}-{i}',
+                description='Группа для замеров'
+            )
+            for i in range(count)
+        ), self.chunk, ignore_conflicts=True)
+        return list(Group.objects.filter(
+            slug__startswith=f'{prefix}-').values_list('pk', flat=True))
+
+    def seed_images(self, prefix, count=5):
+        names = []
+        for i in range(count):
+            buffer = BytesIO()
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            Image.new('RGB', (1920, 1080), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/{prefix}_{i}.jpg', ContentFile(buffer.getvalue())))
+        return names
+
+    def text(self, words=20):
+        return ' '.join(self.random.choices(WORDS, k=words))
+
+    def seed_posts(self, users, groups, images, options):
+        now = timezone.now()
+        spread = timedelta(days=365).total_seconds()
+
+        def posts():
+            for _ in range(options['posts']):
+                has_image = images and self.random.random() < options['images']
+                yield Post(
+                    text=self.text(),
+                    author_id=self.random.choice(users),
+                    group_id=(self.random.choice(groups)
+                              if groups and self.random.random() < 0.5
+                              else None),
+                    image=self.random.choice(images) if has_image else None,
+                    pub_date=now - timedelta(
+                        seconds=self.random.random() * spread),
+                )
+
+        created = chunked_create(
+            Post, posts(), self.chunk, date_fields=['pub_date'])
+        self.stdout.write(f'Постов: {created}')
+
+    def seed_comments(self, users, posts, count):
+        if not posts:
+            return
+        now = timezone.now()
+        created = chunked_create(Comment, (
+            Comment(
+                post_id=self.random.choice(posts),
+                author_id=self.random.choice(users),
+                text=self.text(8),
+                created=now
+            )
+            for _ in range(count)
+        ), self.chunk, date_fields=['created'])
+        self.stdout.write(f'Комментариев: {created}')
+
+    def seed_follows(self, users, average, alpha):
+        # Популярность автора убывает как rank ** -alpha, число
+        # подписок у читателя распределено по Парето.
+        cum_weights = list(accumulate(
+            (rank + 1) ** -alpha for rank in range(len(users))
+        ))
+
+        def follows():
+            for user in users:
+                count = min(
+                    len(users) - 1,
+                    int(self.random.paretovariate(1.5) * average / 3)
+                )
+                for author in set(self.random.choices(
+                        users, cum_weights=cum_weights, k=count)):
+                    if author != user:
+                        yield Follow(user_id=user, author_id=author)
+
+        created = chunked_create(
+            Follow, follows(), self.chunk, ignore_conflicts=True)
+        self.stdout.write(f'Подписок: {created}')
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import sqlite
+
+
+class Command(BaseCommand):
+    help = ('Переносит WAL в основной файл базы и обновляет статистику '
+            'планировщика (wal_checkpoint + optimize). С --every '
+            'работает в цикле, например рядом с сервером приложения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Повторять каждые N секунд'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда нужна только для SQLite')
+        while True:
+            busy, log, checkpointed = sqlite.maintain(connection)
+            self.stdout.write(
+                f'WAL: {log} стр., перенесено {checkpointed}'
+                + (' (база занята)' if busy else '')
+            )
+            if not options['every']:
+                break
+            connection.close()
+            time.sleep(options['every'])
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .cache import versions_match
+
+slow_logger = logging.getLogger('yatube.slow_requests')
+
+_local = threading.local()
+
+# Сколько самых долгих запросов к базе попадает в журнал.
+TOP_QUERIES = 5
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL, шаблоны, кэш и миниатюры."""
+
+    def __init__(self):
+        self.queries = []
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.thumbnail_time = 0.0
+
+    def top_queries(self, limit=TOP_QUERIES):
+        slowest = sorted(self.queries, key=lambda q: q[0], reverse=True)
+        return [
+            {'sql': sql, 'ms': round(duration * 1000, 2)}
+            for duration, sql in slowest[:limit]
+        ]
+
+
+def current():
+    """Метрики текущего запроса или None вне запроса."""
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def timed(attr):
+    """Прибавляет время выполнения блока к полю метрик запроса."""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(
+            metrics, attr,
+            getattr(metrics, attr) + time.perf_counter() - start
+        )
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics = current()
+        if metrics is not None:
+            duration = time.perf_counter() - start
+            metrics.sql_time += duration
+            metrics.queries.append((duration, sql))
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return getattr(match.func, '__name__', match.view_name)
+
+
+class PerformanceMiddleware:
+    """Замеряет SQL, рендеринг шаблонов, обращения к кэшу и миниатюры.
+
+    SQL считается через execute_wrapper, шаблоны и кэш — бэкендами
+    из posts.instrumentation, подключёнными в TEMPLATES и CACHES.
+    Итог отдаётся в заголовке Server-Timing, а запросы дольше
+    SLOW_REQUEST_THRESHOLD_MS пишутся в журнал yatube.slow_requests
+    одной JSON-строкой вместе с самыми долгими запросами к базе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = _local.metrics = RequestMetrics()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(_sql_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        total = time.perf_counter() - start
+        response['Server-Timing'] = self.server_timing(metrics, total)
+        threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 500)
+        if total * 1000 >= threshold:
+            self.log_slow(request, response, metrics, total)
+        return response
+
+    @staticmethod
+    def server_timing(metrics, total):
+        return ', '.join([
+            'db;dur=%.1f;desc="%s queries"' % (
+                metrics.sql_time * 1000, len(metrics.queries)),
+            'tpl;dur=%.1f' % (metrics.template_time * 1000),
+            'cache;desc="hits=%s misses=%s"' % (
+                metrics.cache_hits, metrics.cache_misses),
+            'thumb;dur=%.1f' % (metrics.thumbnail_time * 1000),
+            'total;dur=%.1f' % (total * 1000),
+        ])
+
+    @staticmethod
+    def log_slow(request, response, metrics, total):
+        slow_logger.warning(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': _view_name(request),
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'sql_count': len(metrics.queries),
+            'sql_ms': round(metrics.sql_time * 1000, 2),
+            'template_ms': round(metrics.template_time * 1000, 2),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+            'thumbnail_ms': round(metrics.thumbnail_time * 1000, 2),
+            'top_queries': metrics.top_queries(),
+        }, ensure_ascii=False))
+
+
+class PageCacheMiddleware:
+    """Кэш целых страниц для гостей.
+
+    Сохраняются только ответы представлений, которые объявили свои
+    ленты через Freshness (request.page_cache_tags). Попадание
+    сверяет версии этих лент одним get_many и отдаёт сохранённый
+    ответ, не трогая ORM и шаблоны; любая запись в ленту сдвигает
+    её версию, и страница пересобирается. Запросы с кукой сессии
+    идут мимо кэша.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def cache_key(request):
+        url = request.build_absolute_uri()
+        return 'page:' + hashlib.md5(url.encode()).hexdigest()
+
+    def __call__(self, request):
+        if (request.method not in ('GET', 'HEAD')
+                or settings.SESSION_COOKIE_NAME in request.COOKIES):
+            return self.get_response(request)
+        key = self.cache_key(request)
+        entry = cache.get(key)
+        if entry is not None and versions_match(entry['tags']):
+            return self.hit(request, entry)
+        response = self.get_response(request)
+        tags = getattr(request, 'page_cache_tags', None)
+        if (tags and request.method == 'GET'
+                and not getattr(request, 'served_stale', False)
+                and response.status_code == 200
+                and not response.streaming and not response.cookies):
+            cache.set(key, {
+                'tags': tags,
+                'status': response.status_code,
+                'headers': list(response.items()),
+                'content': response.content,
+            }, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    @staticmethod
+    def hit(request, entry):
+        response = HttpResponse(entry['content'], status=entry['status'])
+        for header, value in entry['headers']:
+            response[header] = value
+        response['X-Page-Cache'] = 'hit'
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified')),
+            response=response
+        )
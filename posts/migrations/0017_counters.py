@@ -0,0 +1,57 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    UserStats = apps.get_model('posts', 'UserStats')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    comments = Comment.objects.values('post_id').annotate(total=Count('id'))
+    for row in comments:
+        Post.objects.filter(pk=row['post_id']).update(
+            comment_count=row['total']
+        )
+    stats = {pk: UserStats(user_id=pk) for pk in User.objects.values_list(
+        'pk', flat=True)}
+    for field, model, key in (
+        ('post_count', Post, 'author_id'),
+        ('follower_count', Follow, 'author_id'),
+        ('following_count', Follow, 'user_id'),
+    ):
+        for row in model.objects.order_by().values(key).annotate(
+                total=Count('id')):
+            setattr(stats[row[key]], field, row['total'])
+    UserStats.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('follower_count', models.PositiveIntegerField(default=0, verbose_name='Количество подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Количество подписок')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='posts/variants/', verbose_name='Файл')),
+                ('width', models.PositiveIntegerField(verbose_name='Ширина')),
+                ('height', models.PositiveIntegerField(verbose_name='Высота')),
+                ('format', models.CharField(max_length=10, verbose_name='Формат')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'ordering': ('width',),
+            },
+        ),
+    ]
@@ -65,10 +65,31 @@ class Post(models.Model):
         blank=True,
         null=True
     )
+    comment_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     class Meta:
-        """Класс для сортировки по датам."""
+        """Класс для сортировки по датам. Индексы повторяют порядок
+        ключа курсора (-pub_date, -id), чтобы ленты читались без
+        сортировки во временном B-дереве."""
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='posts_post_author_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='posts_post_group_date_idx'
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='posts_post_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -99,6 +120,14 @@ class Comment(models.Model):
         help_text='Дата добавляется автоматически'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='posts_comment_post_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     """Модель для подписок/подписчиков на авторов постов."""
@@ -119,3 +148,87 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ['user', 'author']
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='posts_follow_author_user_idx'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые поддерживаются сигналами
+    при создании и удалении постов и подписок."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='stats'
+    )
+    post_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0
+    )
+    follower_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Количество подписок',
+        default=0
+    )
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок. Запись создаётся у каждого
+    подписчика в момент публикации поста (fan-out-on-write)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Владелец ленты',
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Имя автора',
+        related_name='+'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        unique_together = ['user', 'post']
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='posts_timeline_user_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='posts_timeline_user_author_idx'
+            ),
+        ]
+
+
+class ImageVariant(models.Model):
+    """Уменьшенная копия картинки поста для srcset. Таблица хранит
+    готовые имена файлов, чтобы при отрисовке не обращаться к диску."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='image_variants'
+    )
+    image = models.ImageField(
+        upload_to='posts/variants/',
+        verbose_name='Файл'
+    )
+    width = models.PositiveIntegerField(verbose_name='Ширина')
+    height = models.PositiveIntegerField(verbose_name='Высота')
+    format = models.CharField(verbose_name='Формат', max_length=10)
@@ -0,0 +1,144 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class Cursor:
+    """Ссылки на соседние страницы ленты в виде
+    непрозрачных токенов для параметров ?after= и ?before=."""
+
+    def __init__(self, after=None, before=None):
+        self.after = after
+        self.before = before
+
+    def __bool__(self):
+        return bool(self.after or self.before)
+
+
+def _token(value, pk):
+    raw = f'{value.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def encode_cursor(obj, field='pub_date', key='pk'):
+    return _token(getattr(obj, field), getattr(obj, key))
+
+
+def decode_cursor(token):
+    """Возвращает пару (значение поля, id) или None,
+    если токен повреждён."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+def _beyond(cursor, field, key, older):
+    """Условие на строки старше (older) или новее курсора."""
+    value, pk = cursor
+    lookup = 'lt' if older else 'gt'
+    return Q(**{f'{field}__{lookup}': value}) | Q(
+        **{field: value, f'{key}__{lookup}': pk})
+
+
+def paginate(request, queryset, per_page, field='pub_date', descending=True,
+             key='pk'):
+    """Разбивает queryset на страницы по ключу (field, key).
+
+    Без параметров запроса отдаётся первая страница, ?after= и
+    ?before= листают ленту без COUNT(*) и OFFSET. Старые ссылки
+    вида ?page=N обслуживаются обычным Paginator.
+    Возвращает тройку (paginator, page, cursor).
+    """
+    paginator = Paginator(queryset, per_page)
+    if 'page' in request.GET:
+        return paginator, paginator.get_page(request.GET.get('page')), None
+
+    newest_first = (f'-{field}', f'-{key}') if descending else (field, key)
+    oldest_first = (field, key) if descending else (f'-{field}', f'-{key}')
+    after = decode_cursor(request.GET.get('after', ''))
+    before = decode_cursor(request.GET.get('before', ''))
+
+    if before is not None:
+        condition = _beyond(before, field, key, older=not descending)
+        items = list(
+            queryset.filter(condition).order_by(*oldest_first)[:per_page + 1]
+        )
+        has_previous = len(items) > per_page
+        items = items[:per_page][::-1]
+        has_next = True
+    else:
+        if after is not None:
+            queryset = queryset.filter(
+                _beyond(after, field, key, older=descending))
+        items = list(queryset.order_by(*newest_first)[:per_page + 1])
+        has_next = len(items) > per_page
+        items = items[:per_page]
+        has_previous = after is not None
+
+    cursor = Cursor(
+        after=(
+            encode_cursor(items[-1], field, key) if has_next and items
+            else None
+        ),
+        before=(
+            encode_cursor(items[0], field, key) if has_previous and items
+            else None
+        ),
+    )
+    return paginator, Page(items, 1, paginator), cursor
+
+
+def paginate_merged(request, sources, per_page, paginator,
+                    field='pub_date'):
+    """Лента от новых к старым из нескольких queryset.
+
+    sources — пары (queryset, key); каждый queryset читает не больше
+    per_page + 1 строк своим диапазоном индекса по (field, key),
+    страница собирается слиянием. Строки с одинаковыми (field, key)
+    считаются одной. Старые ссылки ?page=N обслуживает paginator.
+    Возвращает тройку (paginator, page, cursor).
+    """
+    if 'page' in request.GET:
+        return paginator, paginator.get_page(request.GET.get('page')), None
+    after = decode_cursor(request.GET.get('after', ''))
+    before = decode_cursor(request.GET.get('before', ''))
+
+    rows = {}
+    for queryset, key in sources:
+        if before is not None:
+            queryset = queryset.filter(
+                _beyond(before, field, key, older=False)
+            ).order_by(field, key)
+        else:
+            if after is not None:
+                queryset = queryset.filter(
+                    _beyond(after, field, key, older=True))
+            queryset = queryset.order_by(f'-{field}', f'-{key}')
+        for obj in queryset[:per_page + 1]:
+            rows.setdefault((getattr(obj, field), getattr(obj, key)), obj)
+    # Для before строки идут от старых к новым, как в paginate.
+    keys = sorted(rows, reverse=before is None)[:per_page + 1]
+
+    if before is not None:
+        has_previous = len(keys) > per_page
+        keys = keys[:per_page][::-1]
+        has_next = True
+    else:
+        has_next = len(keys) > per_page
+        keys = keys[:per_page]
+        has_previous = after is not None
+    cursor = Cursor(
+        after=_token(*keys[-1]) if has_next and keys else None,
+        before=_token(*keys[0]) if has_previous and keys else None,
+    )
+    return paginator, Page([rows[key] for key in keys], 1, paginator), cursor
@@ -0,0 +1,145 @@
+from django.db import connection
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+
+INSTALL_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert "
+    "AFTER INSERT ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete "
+    "AFTER DELETE ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update "
+    "AFTER UPDATE OF text ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+)
+
+UNINSTALL_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+def is_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install(using=connection):
+    """Создаёт индекс и триггеры, если их нет. Пересоздание таблицы
+    posts_post миграциями SQLite удаляет триггеры, поэтому вызов
+    повторяется после каждого migrate."""
+    if not is_available(using):
+        return
+    with using.cursor() as cursor:
+        for statement in INSTALL_SQL:
+            cursor.execute(statement)
+
+
+def uninstall(using=connection):
+    if not is_available(using):
+        return
+    with using.cursor() as cursor:
+        for statement in UNINSTALL_SQL:
+            cursor.execute(statement)
+
+
+def rebuild(using=connection):
+    """Перестраивает индекс по содержимому posts_post."""
+    install(using)
+    if not is_available(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def optimize(using=connection):
+    """Сливает сегменты индекса после массовой вставки. Сами строки
+    попадают в индекс триггерами, rebuild для этого не нужен."""
+    if not is_available(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def match_expression(query):
+    """Каждое слово запроса экранируется как отдельная фраза, так что
+    синтаксис FTS5 из пользовательского ввода не исполняется."""
+    terms = query.split()
+    return ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def filter_matching(queryset, query):
+    """Оставляет в queryset посты, подходящие под запрос (без
+    ранжирования). Подзапрос пишется в WHERE как есть: pk__in=RawSQL
+    берёт его в двойные скобки, и SQLite читает его как скаляр,
+    то есть только первый id."""
+    pk = '%s.%s' % (
+        connection.ops.quote_name(queryset.model._meta.db_table),
+        connection.ops.quote_name(queryset.model._meta.pk.column)
+    )
+    return queryset.extra(
+        where=[f'{pk} IN (SELECT rowid FROM {FTS_TABLE} '
+               f'WHERE {FTS_TABLE} MATCH %s)'],
+        params=[match_expression(query)]
+    )
+
+
+class SearchResults:
+    """Ранжированная выдача для Paginator: считает совпадения и
+    достаёт из индекса только id постов запрошенного среза."""
+
+    def __init__(self, query, queryset=None):
+        self.match = match_expression(query)
+        self.queryset = queryset if queryset is not None else Post.objects
+
+    def count(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                [self.match]
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not self.match:
+            return []
+        start = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, index.stop - start, start]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query, queryset=None):
+    """Посты по запросу, лучшие совпадения первыми. Без SQLite
+    используется обычный поиск по подстроке."""
+    if not is_available():
+        queryset = queryset if queryset is not None else Post.objects.all()
+        return queryset.filter(text__icontains=query)
+    return SearchResults(query, queryset)
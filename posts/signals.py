@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import counters, follows, images, lookups, thumbnails, timeline
+from .cache import bump_version, post_scopes
+from .models import Comment, Follow, Group, ImageVariant, Post, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    # Через __dict__, чтобы отложенное поле не вызывало запрос.
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_init, sender=Group)
+def remember_slug(sender, instance, **kwargs):
+    instance._loaded_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    # Старое имя тоже: после переименования по нему должен быть 404.
+    cache.delete_many({
+        lookups.user_key(instance.username),
+        lookups.user_key(getattr(instance, '_loaded_username', None)),
+    })
+    instance._loaded_username = instance.username
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(pre_save, sender=Post)
+def normalize_image(sender, instance, **kwargs):
+    if instance.image and not instance.image._committed:
+        normalized = images.normalize(instance.image.file)
+        if normalized is not None:
+            instance.image = normalized
+        instance._image_changed = True
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_stats(instance.author_id, post_count=1)
+        timeline.fan_out(instance)
+    elif getattr(instance, '_image_changed', False):
+        instance.image_variants.all().delete()
+    instance._image_changed = False
+    scopes = post_scopes(instance.author_id, instance.group_id)
+    if instance._loaded_group_id not in (None, instance.group_id):
+        scopes.append(f'group:{instance._loaded_group_id}')
+    instance._loaded_group_id = instance.group_id
+    bump_version(
+        f'post:{instance.pk}', *scopes,
+        changed=instance.pub_date if created else None
+    )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_stats(instance.author_id, post_count=-1)
+    bump_version(
+        f'post:{instance.pk}',
+        *post_scopes(instance.author_id, instance.group_id)
+    )
+
+
+def comment_changed(post_id, delta, changed=None):
+    counters.change_comment_count(post_id, delta)
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if post is not None:
+        bump_version(f'post:{post_id}', *post_scopes(*post), changed=changed)
+
+
+@receiver(post_delete, sender=ImageVariant)
+def variant_deleted(sender, instance, **kwargs):
+    # Файл удаляется после фиксации: при откате строка вернётся.
+    name = instance.image.name
+    transaction.on_commit(lambda: thumbnails.delete_variant_file(name))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        comment_changed(instance.post_id, 1, changed=instance.created)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    comment_changed(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_version('index', f'group:{instance.pk}')
+    cache.delete_many({
+        lookups.group_key(instance.slug),
+        lookups.group_key(getattr(instance, '_loaded_slug', None)),
+    })
+    instance._loaded_slug = instance.slug
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        follows.followed(instance.user_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follows.unfollowed(instance.user_id, [instance.author_id])
@@ -0,0 +1,58 @@
+import logging
+import sqlite3
+
+from django.conf import settings
+from django.core import checks
+
+logger = logging.getLogger(__name__)
+
+# Самая старая поддерживаемая версия SQLite: INSERT ... RETURNING
+# (3.35), ROW_NUMBER() OVER в пересборке лент (3.25) и токенизатор
+# unicode61 remove_diacritics 2 в поиске (3.27).
+MIN_VERSION = (3, 35, 0)
+
+
+def pragmas():
+    """Настройки SQLite из SQLITE_PRAGMAS: имя -> значение."""
+    return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: выставляет PRAGMA каждому
+    новому соединению. Соединение живёт CONN_MAX_AGE секунд,
+    так что настройка выполняется не на каждый запрос."""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in pragmas().items():
+        # Выполняется мимо курсора Django, чтобы не попадать
+        # в журнал запросов и счётчики.
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def journal_mode(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        return cursor.fetchone()[0]
+
+
+def maintain(connection):
+    """Переносит WAL в основной файл и обновляет статистику
+    планировщика. Возвращает (заблокировано, страниц в WAL,
+    перенесено страниц) из wal_checkpoint."""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        checkpoint = cursor.fetchone()
+        cursor.execute('PRAGMA optimize')
+    logger.info('wal_checkpoint: %s', checkpoint)
+    return checkpoint
+
+
+def check_version(app_configs=None, **kwargs):
+    """Системная проверка: библиотека SQLite не старше MIN_VERSION."""
+    if sqlite3.sqlite_version_info >= MIN_VERSION:
+        return []
+    return [checks.Error(
+        'SQLite %s слишком старая, нужна %s или новее.' % (
+            sqlite3.sqlite_version, '.'.join(map(str, MIN_VERSION))),
+        id='posts.E001',
+    )]
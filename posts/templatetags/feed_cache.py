@@ -0,0 +1,68 @@
+from django.core.cache.utils import make_template_fragment_key
+from django.template import (Library, Node, TemplateSyntaxError,
+                             VariableDoesNotExist)
+
+from posts.cache import feed_cache_options, get_or_recompute
+
+register = Library()
+
+
+class FeedCacheNode(Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on, version):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+        self.version = version
+
+    def render(self, context):
+        try:
+            timeout = int(self.timeout.resolve(context))
+        except (VariableDoesNotExist, ValueError, TypeError):
+            raise TemplateSyntaxError(
+                '"feed_cache" tag got a bad timeout: %r' % self.timeout)
+        request = context.get('request')
+        if getattr(request, 'served_stale', False):
+            # Данные страницы уже устаревшие: фрагмент из них
+            # нельзя класть в кэш под новой версией.
+            return self.nodelist.render(context)
+        key = make_template_fragment_key(
+            self.fragment_name,
+            [var.resolve(context) for var in self.vary_on]
+        )
+        value, fresh = get_or_recompute(
+            key,
+            lambda: self.nodelist.render(context),
+            timeout,
+            version=self.version and self.version.resolve(context),
+            grace=feed_cache_options()['grace']
+        )
+        if not fresh and request is not None:
+            request.served_stale = True
+        return value
+
+
+@register.tag
+def feed_cache(parser, token):
+    """Как {% cache %}, но с единственным пересчётом: пока один запрос
+    рендерит истёкший фрагмент, остальные отдают старую копию.
+    Смена version делает фрагмент устаревшим.
+
+        {% feed_cache 3600 index_page request.GET.urlencode version=v %}
+    """
+    nodelist = parser.parse(('endfeed_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise TemplateSyntaxError(
+            '%r tag requires at least 2 arguments.' % tokens[0])
+    version = None
+    if tokens[-1].startswith('version='):
+        version = parser.compile_filter(tokens.pop()[len('version='):])
+    return FeedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+        version
+    )
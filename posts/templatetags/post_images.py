@@ -0,0 +1,42 @@
+from django import template
+
+from posts import thumbnails
+from posts.middleware import timed
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, geometry):
+    """Миниатюра картинки поста, если она уже готова. Иначе ставит
+    её создание в очередь и возвращает None для заглушки."""
+    if not image:
+        return None
+    with timed('thumbnail_time'):
+        thumbnail = thumbnails.cached_thumbnail(image.name, geometry)
+    if thumbnail is None:
+        thumbnails.enqueue(image)
+    return thumbnail
+
+
+def _srcset(variants):
+    return ', '.join(f'{v.image.url} {v.width}w' for v in variants)
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post):
+    """Картинка карточки: <picture> с копиями WebP/JPEG, если они уже
+    нарезаны, иначе готовая миниатюра или заглушка."""
+    # Сортировка здесь, а не в Meta.ordering: ORDER BY в prefetch
+    # по списку постов требовал бы временного B-дерева.
+    variants = sorted(post.image_variants.all(), key=lambda v: v.width)
+    if not variants:
+        return {'thumbnail': post_thumbnail(post.image, 'card')}
+    webp = [v for v in variants if v.format == 'webp']
+    jpeg = [v for v in variants if v.format == 'jpeg'] or variants
+    fallback = next((v for v in jpeg if v.width >= 960), jpeg[-1])
+    return {
+        'webp_srcset': _srcset(webp),
+        'jpeg_srcset': _srcset(jpeg),
+        'fallback': fallback,
+    }
@@ -0,0 +1,25 @@
+import threading
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from posts import background
+
+
+class BackgroundTest(TestCase):
+    def test_sync_runs_in_caller_and_keeps_connection(self):
+        connection.ensure_connection()
+        future = background.submit(
+            'test', 1, lambda: threading.current_thread())
+        self.assertIs(future.result(), threading.current_thread())
+        self.assertIsNotNone(connection.connection)
+
+    def test_sync_error_goes_to_future(self):
+        future = background.submit('test', 1, lambda: 1 / 0)
+        self.assertIsInstance(future.exception(), ZeroDivisionError)
+
+    @override_settings(BACKGROUND_TASKS_SYNC=False)
+    def test_pool(self):
+        future = background.submit(
+            'test', 1, lambda: threading.current_thread().name)
+        self.assertTrue(future.result().startswith('test'))
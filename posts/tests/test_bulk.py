@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+
+from posts.bulk import chunked_create, reserve_ids
+from posts.models import Post
+
+User = get_user_model()
+
+
+class BulkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='VladOs')
+
+    def test_chunked_create_keeps_dates(self):
+        date = datetime(2015, 3, 1, 12, tzinfo=timezone.utc)
+        created = chunked_create(Post, (
+            Post(text=f'Пост {i}', author=BulkTest.author, pub_date=date)
+            for i in range(5)
+        ), 2, date_fields=['pub_date'])
+        self.assertEqual(created, 5)
+        self.assertEqual(
+            set(Post.objects.values_list('pub_date', flat=True)), {date})
+        # Общая модель не менялась: обычное создание ставит текущее время.
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+        post = Post.objects.create(
+            text='Новый', author=BulkTest.author, pub_date=date)
+        self.assertGreater(post.pub_date, date)
+
+    def test_reserved_ids_skip_deleted_rows(self):
+        deleted = Post.objects.create(text='Пост', author=BulkTest.author).pk
+        Post.objects.filter(pk=deleted).delete()
+        with transaction.atomic():
+            ids = reserve_ids(Post, 3)
+        self.assertEqual(list(ids), [deleted + 1, deleted + 2, deleted + 3])
+        self.assertGreater(
+            Post.objects.create(text='Пост', author=BulkTest.author).pk,
+            deleted + 3)
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from yatube.cache import SQLiteCache
+
+
+def _incr_many(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        cache = self.make_cache()
+        cache.set('post', {'text': 'Пост'})
+        self.assertEqual(cache.get('post'), {'text': 'Пост'})
+        self.assertIsNone(cache.get('missing'))
+        self.assertFalse(cache.add('post', 'другой'))
+        self.assertTrue(cache.add('new', 1))
+        cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(
+            cache.get_many(['a', 'b', 'missing']), {'a': 1, 'b': 2})
+        cache.delete_many(['a', 'b'])
+        self.assertEqual(cache.get_many(['a', 'b']), {})
+
+    def test_expired_keys(self):
+        cache = self.make_cache()
+        cache.set('key', 'value', timeout=0)
+        self.assertIsNone(cache.get('key'))
+        self.assertTrue(cache.add('key', 'fresh'))
+        self.assertEqual(cache.get('key'), 'fresh')
+
+    def test_shared_between_instances(self):
+        """Второй экземпляр (другой процесс) видит те же данные."""
+        self.make_cache().set('shared', 42)
+        self.assertEqual(self.make_cache().get('shared'), 42)
+
+    def test_incr_is_atomic_across_processes(self):
+        cache = self.make_cache()
+        cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=_incr_many, args=(self.location, 100))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(cache.get('counter'), 400)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читанные ключи."""
+        cache = self.make_cache(
+            MAX_ENTRIES=10, CULL_FREQUENCY=5, CULL_EVERY=1,
+            LRU_RESOLUTION=0
+        )
+        for i in range(10):
+            cache.set(f'key{i}', i)
+            time.sleep(0.002)
+        cache.get('key0')
+        cache.set('key10', 10)
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertIsNone(cache.get('key1'))
+        self.assertEqual(cache.stats()['entries'], 8)
+
+    def test_size_limit(self):
+        cache = self.make_cache(MAX_BYTES=10000, CULL_EVERY=1)
+        for i in range(20):
+            cache.set(f'key{i}', 'x' * 1000)
+        self.assertLessEqual(cache.stats()['bytes'], 10000)
+        self.assertIsNotNone(cache.get('key19'))
+
+    def test_stats(self):
+        cache = self.make_cache()
+        cache.set('key', 1)
+        cache.get('key')
+        cache.get_many(['key', 'missing'])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+        self.assertEqual(stats['entries'], 1)
+
+    def test_private_file(self):
+        self.make_cache().set('key', 1)
+        self.assertEqual(os.stat(self.location).st_mode & 0o777, 0o600)
+        os.chmod(self.location, 0o644)
+        self.make_cache().get('key')
+        self.assertEqual(os.stat(self.location).st_mode & 0o777, 0o600)
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.views import COMMENTS_PER_PAGE
+
+User = get_user_model()
+
+COMMENTS = COMMENTS_PER_PAGE * 2 + 5
+
+
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        cls.readers = [
+            User.objects.create(username='reader%s' % i) for i in range(5)
+        ]
+        cls.post = Post.objects.create(
+            text='Популярный пост',
+            author=cls.user_author
+        )
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post,
+                author=cls.readers[i % 5],
+                text='Коммент %s' % i
+            )
+            for i in range(COMMENTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.kwargs = {
+            'username': CommentPagesTest.user_author.username,
+            'post_id': CommentPagesTest.post.id,
+        }
+
+    def test_post_page_renders_first_comments(self):
+        response = self.guest_client.get(reverse('post', kwargs=self.kwargs))
+        page = list(response.context['comment_page'])
+        self.assertEqual(len(page), COMMENTS_PER_PAGE)
+        self.assertEqual(
+            page,
+            list(Comment.objects.order_by('created', 'pk')[:COMMENTS_PER_PAGE])
+        )
+        self.assertContains(
+            response, reverse('post_comments', kwargs=self.kwargs))
+
+    def test_fragment_walks_all_comments(self):
+        """Фрагменты по ?after= отдают все комментарии без повторов
+        и постоянным числом запросов."""
+        response = self.guest_client.get(reverse('post', kwargs=self.kwargs))
+        seen = list(response.context['comment_page'])
+        cursor = response.context['comment_cursor']
+        while cursor.after:
+            url = reverse('post_comments', kwargs=self.kwargs)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.guest_client.get(
+                    url + '?after=' + cursor.after)
+            # Проверка поста и страница комментариев.
+            self.assertEqual(len(queries.captured_queries), 2)
+            self.assertTemplateUsed(response, 'includes/comment_list.html')
+            seen.extend(response.context['comment_page'])
+            cursor = response.context['comment_cursor']
+        self.assertEqual(len(seen), COMMENTS)
+        self.assertEqual(len(set(seen)), COMMENTS)
+
+    def test_fragment_404_for_unknown_post_or_author(self):
+        other = User.objects.create(username='stranger')
+        for kwargs in (
+            dict(self.kwargs, post_id=CommentPagesTest.post.id + 100),
+            dict(self.kwargs, username=other.username),
+            dict(self.kwargs, username='nobody'),
+        ):
+            with self.subTest(**kwargs):
+                response = self.guest_client.get(
+                    reverse('post_comments', kwargs=kwargs))
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Группа для теста'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user_author,
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTest.reader)
+
+    def urls(self):
+        post = ConditionalGetTest.post
+        return {
+            'index': reverse('index'),
+            'group': reverse('group', kwargs={
+                'slug': ConditionalGetTest.group.slug}),
+            'profile': reverse('profile', kwargs={
+                'username': post.author.username}),
+            'post': reverse('post', kwargs={
+                'username': post.author.username, 'post_id': post.id}),
+        }
+
+    def revalidate(self, client, url):
+        # Первый ответ может выставить куку CSRF, от которой
+        # зависит ETag авторизованного пользователя.
+        client.get(url)
+        response = client.get(url)
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_not_modified(self):
+        """Повторный запрос с ETag получает 304 без рендеринга."""
+        for name, url in self.urls().items():
+            for client in (self.guest_client, self.authorized_client):
+                with self.subTest(name=name):
+                    response = self.revalidate(client, url)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response.templates, [])
+
+    def test_last_modified_only_for_guests(self):
+        url = reverse('index')
+        response = self.guest_client.get(url)
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(
+            self.authorized_client.get(url).has_header('Last-Modified'))
+
+    def test_guest_and_user_etags_differ(self):
+        url = reverse('index')
+        self.assertNotEqual(
+            self.guest_client.get(url)['ETag'],
+            self.authorized_client.get(url)['ETag']
+        )
+
+    def test_new_post_changes_feeds(self):
+        urls = self.urls()
+        etags = {name: self.guest_client.get(url)['ETag']
+                 for name, url in urls.items()}
+        Post.objects.create(
+            text='Новый пост',
+            author=ConditionalGetTest.user_author,
+            group=ConditionalGetTest.group
+        )
+        for name in ('index', 'group', 'profile'):
+            with self.subTest(name=name):
+                response = self.guest_client.get(
+                    urls[name], HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_post_page(self):
+        url = self.urls()['post']
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(
+            post=ConditionalGetTest.post,
+            author=ConditionalGetTest.reader,
+            text='Коммент'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Коммент')
+
+    def test_follow_changes_profile(self):
+        """Кнопка подписки и счётчики не застревают в кэше клиента."""
+        url = self.urls()['profile']
+        etag = self.authorized_client.get(url)['ETag']
+        Follow.objects.create(
+            user=ConditionalGetTest.reader,
+            author=ConditionalGetTest.user_author
+        )
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        cls.user = User.objects.create(username='reader')
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        """Счётчики постов и комментариев меняются
+        при создании и удалении объектов."""
+        post = Post.objects.create(text='Пост', author=self.user_author)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Коммент')
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.stats(self.user_author).post_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.user_author).post_count, 0)
+
+    def test_follow_counters(self):
+        Follow.objects.create(user=self.user, author=self.user_author)
+        self.assertEqual(self.stats(self.user_author).follower_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        Follow.objects.filter(user=self.user).delete()
+        self.assertEqual(self.stats(self.user_author).follower_count, 0)
+        self.assertEqual(self.stats(self.user).following_count, 0)
+
+    def test_recount_repairs_drift(self):
+        """bulk_create обходит сигналы, recount исправляет счётчики."""
+        Post.objects.bulk_create(
+            Post(text='Пост %s' % i, author=self.user_author)
+            for i in range(3)
+        )
+        post = Post.objects.first()
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.user, text='Коммент')
+        ])
+        Follow.objects.bulk_create([
+            Follow(user=self.user, author=self.user_author)
+        ])
+        UserStats.objects.filter(user=self.user).delete()
+        call_command('recount', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.stats(self.user_author).post_count, 3)
+        self.assertEqual(self.stats(self.user_author).follower_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+
+    def test_drifted_counter_stays_at_zero(self):
+        """Удаление при счётчике, уже разошедшемся до нуля,
+        не роняет запрос."""
+        post = Post.objects.create(text='Пост', author=self.user_author)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Коммент')
+        Post.objects.filter(pk=post.pk).update(comment_count=0)
+        UserStats.objects.filter(user=self.user_author).update(post_count=0)
+        comment.delete()
+        post.delete()
+        self.assertEqual(self.stats(self.user_author).post_count, 0)
@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import export
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='VladOs')
+        cls.other = User.objects.create(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Группа для теста')
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), (255, 0, 0)).save(buffer, 'JPEG')
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.user,
+            group=cls.group,
+            image=SimpleUploadedFile('small.jpg', buffer.getvalue())
+        )
+        Post.objects.create(text='Второй пост', author=cls.user)
+        Post.objects.create(text='Чужой пост', author=cls.other)
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Свой коммент')
+        Comment.objects.create(
+            post=cls.post, author=cls.other, text='Чужой коммент')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(ExportTest.user)
+
+    def get(self, export_format):
+        response = self.client.get(
+            reverse('export'), {'format': export_format})
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_ndjson(self):
+        records = [
+            json.loads(line)
+            for line in self.get('ndjson').decode().splitlines()
+        ]
+        self.assertEqual(
+            [(r['type'], r['text']) for r in records],
+            [('post', 'Пост с картинкой'), ('post', 'Второй пост'),
+             ('comment', 'Свой коммент')]
+        )
+        self.assertEqual(records[0]['group'], 'group')
+        self.assertEqual(records[2]['post'], ExportTest.post.pk)
+
+    def test_csv(self):
+        content = self.get('csv').decode('utf-8-sig')
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['image'], ExportTest.post.image.name)
+        self.assertEqual(rows[2]['type'], 'comment')
+
+    def test_zip_streams_in_chunks(self):
+        chunks = list(export.zip_archive(ExportTest.user))
+        self.assertGreater(len(chunks), 1)
+        archive = zipfile.ZipFile(BytesIO(b''.join(chunks)))
+        name = ExportTest.post.image.name
+        self.assertCountEqual(
+            archive.namelist(), ['posts.ndjson', 'comments.ndjson', name])
+        with open(os.path.join(MEDIA_ROOT, name), 'rb') as image:
+            self.assertEqual(archive.read(name), image.read())
+        self.assertEqual(
+            len(archive.read('posts.ndjson').splitlines()), 2)
+
+    def test_unknown_format_and_login(self):
+        response = self.client.get(reverse('export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+        response = Client().get(reverse('export'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_command_writes_file(self):
+        output = os.path.join(MEDIA_ROOT, 'export.ndjson')
+        call_command('export_content', 'VladOs', '--output', output,
+                     stdout=StringIO())
+        with open(output, encoding='utf-8') as exported:
+            self.assertEqual(len(exported.readlines()), 3)
@@ -0,0 +1,112 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+class FollowEndpointTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='reader')
+        cls.authors = [
+            User.objects.create(username='author%s' % i) for i in range(3)
+        ]
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(FollowEndpointTest.user)
+        self.author = FollowEndpointTest.authors[0]
+        self.follow_url = reverse('profile_follow', kwargs={
+            'username': self.author.username})
+        self.unfollow_url = reverse('profile_unfollow', kwargs={
+            'username': self.author.username})
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_follow_redirects_to_profile(self):
+        response = self.client.get(self.follow_url)
+        self.assertRedirects(response, reverse('profile', kwargs={
+            'username': self.author.username}))
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=FollowEndpointTest.user,
+            post=FollowEndpointTest.post).exists())
+
+    def test_follow_is_idempotent(self):
+        """Повторная подписка не создаёт строк и не сдвигает счётчики."""
+        for _ in range(2):
+            self.client.get(self.follow_url)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.stats(self.author).follower_count, 1)
+        self.assertEqual(
+            self.stats(FollowEndpointTest.user).following_count, 1)
+        for _ in range(2):
+            self.client.get(self.unfollow_url)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.stats(self.author).follower_count, 0)
+        self.assertEqual(
+            self.stats(FollowEndpointTest.user).following_count, 0)
+
+    def test_repeated_follow_skips_profile_render(self):
+        self.client.get(self.follow_url)
+        response = self.client.get(self.follow_url)
+        self.assertEqual(response.templates, [])
+
+    def test_json_response_has_counts(self):
+        response = self.client.get(
+            self.follow_url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json(), {
+            'following': True, 'followers': 1, 'follows': 1})
+        response = self.client.get(
+            self.unfollow_url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json(), {
+            'following': False, 'followers': 0, 'follows': 0})
+
+    def test_self_follow_ignored(self):
+        response = self.client.get(
+            reverse('profile_follow', kwargs={
+                'username': FollowEndpointTest.user.username}),
+            HTTP_ACCEPT='application/json'
+        )
+        self.assertFalse(response.json()['following'])
+        self.assertFalse(Follow.objects.exists())
+
+    def test_bulk_follow(self):
+        Follow.objects.create(
+            user=FollowEndpointTest.user, author=self.author)
+        usernames = [author.username for author in FollowEndpointTest.authors]
+        response = self.client.post(
+            reverse('follow_bulk'),
+            json.dumps({'usernames': usernames + ['nobody', 'reader']}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.json(), {
+            'followed': ['author1', 'author2'],
+            'unknown': ['nobody'],
+            'follows': 3,
+        })
+        self.assertEqual(Follow.objects.count(), 3)
+        for author in FollowEndpointTest.authors:
+            self.assertEqual(self.stats(author).follower_count, 1)
+
+    def test_bulk_follow_form_and_errors(self):
+        response = self.client.post(
+            reverse('follow_bulk'), {'username': ['author1']})
+        self.assertEqual(response.json()['followed'], ['author1'])
+        response = self.client.post(
+            reverse('follow_bulk'), '{"usernames": "author2"}',
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            self.client.get(reverse('follow_bulk')).status_code, 405)
@@ -1,8 +1,17 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
+from posts import images
+from posts.cache import get_version
 from posts.models import Comment, Group, Post
 
 User = get_user_model()
@@ -113,3 +122,100 @@ class PostFormTest(TestCase):
             follow=True,
         )
         self.assertEqual(Comment.objects.count(), comments_count)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PostImageFormTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostImageFormTest.user_author)
+
+    def photo(self, size=(3000, 1000), orientation=None, gps=False,
+              quality=100):
+        buffer = BytesIO()
+        image = Image.new('RGB', size, (0, 128, 255))
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        if gps:
+            exif[0x8825] = {1: 'N', 2: (55.0, 45.0, 0.0)}
+        image.save(buffer, 'JPEG', quality=quality, exif=exif.tobytes())
+        return SimpleUploadedFile(
+            'photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_is_normalized(self):
+        """Картинка поворачивается по EXIF, уменьшается
+        и пережимается при загрузке."""
+        uploaded = self.photo(orientation=6)
+        self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Фото', 'image': uploaded}
+        )
+        post = Post.objects.get(text='Фото')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (640, 1920))
+            self.assertNotIn(0x0112, image.getexif())
+        self.assertLess(post.image.size, uploaded.size)
+
+    def test_metadata_is_stripped(self):
+        """EXIF с координатами удаляется, даже если картинку
+        не нужно поворачивать, уменьшать и пережимать."""
+        uploaded = self.photo((100, 100), gps=True, quality=20)
+        self.authorized_client.post(
+            reverse('new_post'), data={'text': 'Фото', 'image': uploaded})
+        post = Post.objects.get(text='Фото')
+        with Image.open(post.image.path) as image:
+            exif = image.getexif()
+            self.assertNotIn(0x8825, exif)
+            self.assertEqual(exif.get(images.SOFTWARE_TAG), images.MARKER)
+
+    def test_normalize_is_idempotent(self):
+        self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Фото', 'image': self.photo()}
+        )
+        post = Post.objects.get(text='Фото')
+        with post.image.open() as file:
+            self.assertIsNone(images.normalize(file))
+        call_command('normalize_images', stdout=StringIO())
+        self.assertEqual(Post.objects.get(pk=post.pk).image, post.image)
+
+    def test_normalize_command_refreshes_post_page(self):
+        name = default_storage.save('posts/raw.jpg', self.photo(gps=True))
+        post = Post.objects.create(
+            text='Старое фото', author=PostImageFormTest.user_author,
+            image=name)
+        version = get_version(f'post:{post.pk}')
+        call_command('normalize_images', '--delete-originals',
+                     stdout=StringIO())
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, name)
+        self.assertFalse(default_storage.exists(name))
+        self.assertNotEqual(get_version(f'post:{post.pk}'), version)
+
+    def test_unreadable_image_is_left_alone(self):
+        broken = SimpleUploadedFile('photo.jpg', b'\xff\xd8\xff' + b'0' * 100)
+        with self.assertLogs('posts.images', 'WARNING'):
+            self.assertIsNone(images.normalize(broken))
+
+    @override_settings(POST_IMAGE_MAX_BYTES=1024)
+    def test_too_large_upload_is_rejected(self):
+        response = self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Фото', 'image': self.photo()}
+        )
+        self.assertTrue(response.context['form'].errors.get('image'))
+        self.assertFalse(Post.objects.filter(text='Фото').exists())
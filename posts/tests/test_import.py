@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.cache import get_version
+from posts.models import (Comment, Follow, Group, Post, TimelineEntry,
+                          UserStats)
+from posts.search import search_posts
+
+User = get_user_model()
+
+
+class ImportContentTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.author = User.objects.create(username='VladOs')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Группа для теста')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def run_import(self, name, content, *args):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        output = StringIO()
+        call_command('import_content', path, *args, stdout=output)
+        return output.getvalue()
+
+    def jsonl(self, *records):
+        return ''.join(json.dumps(record) + '\n' for record in records)
+
+    def test_import_jsonl(self):
+        output = self.run_import('content.jsonl', self.jsonl(
+            {'type': 'follow', 'user': 'reader', 'author': 'VladOs'},
+            {'type': 'post', 'id': 10, 'author': 'VladOs',
+             'text': 'Импортированный пост', 'group': 'group',
+             'pub_date': '2015-03-01T12:00:00+00:00'},
+            {'type': 'post', 'id': 11, 'author': 'VladOs', 'text': 'Второй'},
+            {'type': 'comment', 'post': 10, 'author': 'reader',
+             'text': 'Коммент', 'created': '2015-03-02T08:00:00'},
+            {'type': 'post', 'author': 'nobody', 'text': 'Без автора'},
+            {'type': 'comment', 'post': 99, 'author': 'reader',
+             'text': 'К чужому посту'},
+        ), '--chunk-size', '1', '--batch-size', '1')
+        post = Post.objects.get(text='Импортированный пост')
+        self.assertEqual(
+            post.pub_date, datetime(2015, 3, 1, 12, tzinfo=timezone.utc))
+        self.assertEqual(post.group, ImportContentTest.group)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post, post)
+        self.assertEqual(comment.created.year, 2015)
+        self.assertTrue(Follow.objects.filter(
+            user=ImportContentTest.reader,
+            author=ImportContentTest.author).exists())
+
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(UserStats.objects.get(
+            user=ImportContentTest.author).post_count, 2)
+        self.assertEqual(TimelineEntry.objects.filter(
+            user=ImportContentTest.reader).count(), 2)
+        self.assertEqual(
+            list(search_posts('импортированный')[:10]), [post])
+
+        self.assertIn('Пропущено (нет пользователя в поле author): 1',
+                      output)
+        self.assertIn('Пропущено (нет поста из файла): 1', output)
+        self.assertIn('строк/с', output)
+
+    def test_follow_rows_refresh_both_profiles(self):
+        scopes = [f'author:{ImportContentTest.author.pk}',
+                  f'author:{ImportContentTest.reader.pk}']
+        before = [get_version(scope) for scope in scopes]
+        self.run_import('follows.jsonl', self.jsonl(
+            {'type': 'follow', 'user': 'reader', 'author': 'VladOs'}))
+        for scope, version in zip(scopes, before):
+            self.assertNotEqual(get_version(scope), version, scope)
+
+    def test_reimport_export(self):
+        """CSV из export_content загружается обратно с --author."""
+        Post.objects.create(
+            text='Пост для выгрузки', author=ImportContentTest.author)
+        path = os.path.join(self.directory, 'export.csv')
+        call_command('export_content', 'VladOs', '--format', 'csv',
+                     '--output', path)
+        with open(path, encoding='utf-8') as exported:
+            content = exported.read()
+        self.run_import('export.csv', content, '--author', 'reader')
+        post = Post.objects.get(author=ImportContentTest.reader)
+        self.assertEqual(post.text, 'Пост для выгрузки')
+
+    def test_bad_lines_and_image_paths_are_skipped(self):
+        deleted = Post.objects.create(
+            text='Удалённый', author=ImportContentTest.author).pk
+        Post.objects.filter(pk=deleted).delete()
+        broken = '{"type": "post",\n'
+        output = self.run_import('content.jsonl', broken + self.jsonl(
+            {'type': 'post', 'author': 'VladOs', 'text': 'Наружу',
+             'image': '../../etc/passwd'},
+            {'type': 'post', 'author': 'VladOs', 'text': 'С картинкой',
+             'image': 'posts/photo.jpg'},
+        ) + '[1, 2]\n')
+        post = Post.objects.get()
+        self.assertEqual(post.image.name, 'posts/photo.jpg')
+        # Id удалённого поста не выдаётся повторно.
+        self.assertGreater(post.pk, deleted)
+        self.assertIn('Пропущено (строка не разобрана): 2', output)
+        self.assertIn('Пропущено (путь картинки вне MEDIA_ROOT): 1', output)
+
+    def test_unreadable_file_still_rebuilds(self):
+        """Пачки, записанные до ошибки чтения, попадают в счётчики."""
+        path = os.path.join(self.directory, 'broken.jsonl')
+        with open(path, 'wb') as source:
+            source.write(self.jsonl(*(
+                {'type': 'post', 'author': 'VladOs', 'text': 'Пост %s' % i}
+                for i in range(300)
+            )).encode() + b'\xff\xfe\n')
+        with self.assertRaises(CommandError):
+            call_command('import_content', path, '--chunk-size', '10',
+                         stdout=StringIO())
+        count = Post.objects.count()
+        self.assertGreater(count, 0)
+        self.assertEqual(UserStats.objects.get(
+            user=ImportContentTest.author).post_count, count)
@@ -0,0 +1,68 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.middleware import current, slow_logger
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user_author
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def timings(self, response):
+        return {
+            part.strip().split(';')[0]: part.strip()
+            for part in response['Server-Timing'].split(',')
+        }
+
+    def test_server_timing_header(self):
+        response = self.guest_client.get(reverse('index'))
+        timings = self.timings(response)
+        self.assertCountEqual(
+            timings, ['db', 'tpl', 'cache', 'thumb', 'total'])
+        self.assertNotIn('desc="0 queries"', timings['db'])
+        # Фрагмент ленты ещё не закэширован.
+        self.assertNotIn('misses=0', timings['cache'])
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_logged(self):
+        post = PerformanceMiddlewareTest.post
+        with self.assertLogs('yatube.slow_requests') as logs:
+            self.guest_client.get(reverse('post', kwargs={
+                'username': post.author.username, 'post_id': post.id}))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'post_view')
+        self.assertEqual(record['status'], 200)
+        self.assertTrue(record['top_queries'])
+        self.assertGreater(record['sql_count'], 0)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=60_000)
+    def test_fast_request_not_logged(self):
+        with mock.patch.object(slow_logger, 'warning') as warning:
+            self.guest_client.get(reverse('index'))
+        warning.assert_not_called()
+
+    def test_template_time_counted(self):
+        response = self.guest_client.get(reverse('index'))
+        self.assertNotIn('tpl;dur=0.0', self.timings(response)['tpl'])
+        # Шаблоны вне запроса рендерятся без метрик.
+        self.assertIsNone(current())
+        self.assertTrue(render_to_string('includes/footer.html'))
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase
+
+from posts.lookups import group_or_404, user_or_404
+from posts.models import Group
+
+User = get_user_model()
+
+
+class LookupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='VladOs')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Группа для теста'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_second_lookup_skips_database(self):
+        with self.assertNumQueries(2):
+            user_or_404('VladOs')
+            group_or_404('group')
+            user_or_404('VladOs')
+        with self.assertNumQueries(0):
+            self.assertEqual(user_or_404('VladOs'), LookupCacheTest.user)
+            self.assertEqual(group_or_404('group'), LookupCacheTest.group)
+
+    def test_missing_object_is_cached(self):
+        for _ in range(2):
+            with self.assertRaises(Http404):
+                user_or_404('nobody')
+        with self.assertNumQueries(0):
+            with self.assertRaises(Http404):
+                user_or_404('nobody')
+
+    def test_created_object_replaces_missing_mark(self):
+        with self.assertRaises(Http404):
+            group_or_404('new')
+        Group.objects.create(title='Новая', slug='new', description='-')
+        self.assertEqual(group_or_404('new').title, 'Новая')
+
+    def test_rename_invalidates_both_names(self):
+        user = User.objects.get(pk=LookupCacheTest.user.pk)
+        user_or_404('VladOs')
+        user.username = 'Renamed'
+        user.save()
+        with self.assertRaises(Http404):
+            user_or_404('VladOs')
+        self.assertEqual(user_or_404('Renamed').pk, user.pk)
+
+    def test_group_change_and_delete_invalidate(self):
+        group = Group.objects.get(pk=LookupCacheTest.group.pk)
+        group_or_404('group')
+        group.title = 'Другая'
+        group.save()
+        self.assertEqual(group_or_404('group').title, 'Другая')
+        group.delete()
+        with self.assertRaises(Http404):
+            group_or_404('group')
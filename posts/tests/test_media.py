@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+
+from django.test import Client, TestCase, override_settings
+
+from yatube.files import parse_range
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_ACCEL='')
+class MediaViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(MEDIA_ROOT, 'posts'))
+        os.makedirs(os.path.join(MEDIA_ROOT, 'cache', 'ab', 'cd'))
+        for name in ('posts/photo.jpg',
+                     'cache/ab/cd/0123456789abcdef0123456789abcdef.jpg'):
+            with open(os.path.join(MEDIA_ROOT, name), 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.url = '/media/posts/photo.jpg'
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_whole_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+    def test_hashed_name_is_immutable(self):
+        response = self.client.get(
+            '/media/cache/ab/cd/0123456789abcdef0123456789abcdef.jpg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.content(response), CONTENT[10:20])
+        self.assertEqual(
+            response['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '10')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(self.content(response), CONTENT[-5:])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(
+            response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range_mismatch_sends_whole_file(self):
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_missing_and_outside_root(self):
+        self.assertEqual(
+            self.client.get('/media/posts/none.jpg').status_code, 404)
+        self.assertEqual(
+            self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/posts/').status_code, 404)
+
+    @override_settings(MEDIA_ACCEL='nginx')
+    def test_nginx_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/photo.jpg')
+        self.assertEqual(response.content, b'')
+        self.assertIn('ETag', response)
+
+    @override_settings(MEDIA_ACCEL='apache')
+    def test_sendfile_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'],
+                         os.path.join(MEDIA_ROOT, 'posts', 'photo.jpg'))
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=5-100', 10), (5, 9))
+        self.assertIsNone(parse_range('bytes=0-1,3-4', 10))
+        self.assertIsNone(parse_range('items=0-1', 10))
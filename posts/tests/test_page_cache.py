@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.apps import reset_pages
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Группа для теста'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user_author,
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.post_url = reverse('post', kwargs={
+            'username': PageCacheTest.user_author.username,
+            'post_id': PageCacheTest.post.id})
+        self.profile_url = reverse('profile', kwargs={
+            'username': PageCacheTest.user_author.username})
+        self.group_url = reverse('group', kwargs={
+            'slug': PageCacheTest.group.slug})
+
+    def assertCached(self, url):
+        self.assertEqual(
+            self.guest_client.get(url)['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response.templates, [])
+        return response
+
+    def test_guest_hits_skip_orm_and_templates(self):
+        for url in (reverse('index'), self.group_url, self.profile_url,
+                    self.post_url, reverse('index') + '?page=1'):
+            with self.subTest(url=url):
+                response = self.assertCached(url)
+                self.assertContains(response, 'Тестовый пост')
+
+    def test_hit_answers_conditional_get(self):
+        response = self.assertCached(reverse('index'))
+        response = self.guest_client.get(
+            reverse('index'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_authorized_requests_bypass_cache(self):
+        client = Client()
+        client.force_login(PageCacheTest.reader)
+        for _ in range(2):
+            response = client.get(reverse('index'))
+            self.assertFalse(response.has_header('X-Page-Cache'))
+            self.assertIsNotNone(response.context)
+
+    def test_new_post_invalidates_feeds(self):
+        for url in (reverse('index'), self.group_url, self.profile_url):
+            self.assertCached(url)
+        Post.objects.create(
+            text='Свежий пост',
+            author=PageCacheTest.user_author,
+            group=PageCacheTest.group
+        )
+        for url in (reverse('index'), self.group_url, self.profile_url):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'miss')
+                self.assertContains(response, 'Свежий пост')
+
+    def test_comment_invalidates_post_page(self):
+        self.assertCached(self.post_url)
+        Comment.objects.create(
+            post=PageCacheTest.post,
+            author=PageCacheTest.reader,
+            text='Свежий коммент'
+        )
+        self.assertContains(self.guest_client.get(self.post_url),
+                            'Свежий коммент')
+
+    def test_group_and_follow_invalidate_pages(self):
+        self.assertCached(self.group_url)
+        self.assertCached(self.profile_url)
+        group = PageCacheTest.group
+        group.title = 'Новое название'
+        group.save()
+        self.assertContains(self.guest_client.get(self.group_url),
+                            'Новое название')
+        Follow.objects.create(
+            user=PageCacheTest.reader, author=PageCacheTest.user_author)
+        response = self.guest_client.get(self.profile_url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertEqual(response.context['followers'], 1)
+
+    def test_migrate_invalidates_pages_and_keeps_sessions(self):
+        self.assertCached(reverse('index'))
+        cache.set('session', 'данные сессии')
+        reset_pages(sender=None)
+        self.assertEqual(
+            self.guest_client.get(reverse('index'))['X-Page-Cache'], 'miss')
+        self.assertEqual(cache.get('session'), 'данные сессии')
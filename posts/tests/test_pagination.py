@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+POSTS_PER_PAGE = 12
+
+
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        Post.objects.bulk_create(
+            Post(author=cls.user_author, text='Пост %s' % i)
+            for i in range(30)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_walks_whole_feed(self):
+        """Переход по ?after= и обратно по ?before= проходит
+        всю ленту без пропусков и повторов."""
+        seen = []
+        url = reverse('index')
+        pages = []
+        while url:
+            response = self.guest_client.get(url)
+            page = list(response.context.get('page'))
+            pages.append(page)
+            seen.extend(page)
+            cursor = response.context.get('cursor')
+            url = cursor.after and reverse('index') + '?after=' + cursor.after
+        self.assertEqual(len(seen), Post.objects.count())
+        self.assertEqual(len(set(seen)), len(seen))
+        self.assertEqual(
+            [post.pk for post in seen],
+            list(Post.objects.order_by('-pub_date', '-pk')
+                 .values_list('pk', flat=True))
+        )
+        response = self.guest_client.get(
+            reverse('index') + '?before=' + cursor.before
+        )
+        self.assertEqual(list(response.context.get('page')), pages[-2])
+
+    def test_first_page_skips_count(self):
+        """Первая страница не выполняет COUNT(*)."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(reverse('index'))
+        self.assertEqual(
+            len(response.context.get('page').object_list), POSTS_PER_PAGE)
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries.captured_queries)
+        )
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        response = self.guest_client.get(reverse('index') + '?after=мусор')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context.get('cursor').before)
+
+    def test_numbered_pages_still_work(self):
+        response = self.guest_client.get(reverse('index') + '?page=3')
+        self.assertEqual(response.context.get('page').number, 3)
+        self.assertEqual(
+            len(response.context.get('page').object_list),
+            Post.objects.count() - 2 * POSTS_PER_PAGE
+        )
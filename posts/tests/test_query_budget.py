@@ -0,0 +1,153 @@
+from contextlib import contextmanager
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+AUTHORS = 6
+POSTS = 360
+COMMENTS_PER_POST = 3
+
+QUERY_BUDGETS = {
+    'index': 2,
+    'group': 3,
+    'profile': 3,
+    'post': 2,
+    'follow_index': 3,
+    'post_edit': 2,
+    'new_post': 1,
+}
+# Сессия и пользователь авторизованного клиента берутся из кэша.
+AUTH_QUERIES = 0
+
+
+class QueryBudgetTest(TestCase):
+    """Каждая страница выполняет постоянное число запросов
+    на наборе данных из сотен постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create(username='author%s' % i)
+            for i in range(AUTHORS)
+        ]
+        cls.reader = User.objects.create(username='reader')
+        cls.groups = [
+            Group.objects.create(
+                title='Группа %s' % i,
+                slug='group-%s' % i,
+                description='Группа для теста'
+            )
+            for i in range(3)
+        ]
+        Post.objects.bulk_create(
+            Post(
+                text='Пост %s' % i,
+                author=cls.authors[i % AUTHORS],
+                group=cls.groups[i % 3] if i % 4 else None
+            )
+            for i in range(POSTS)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=post, author=cls.reader, text='Коммент')
+            for post in Post.objects.all()
+            for _ in range(COMMENTS_PER_POST)
+        )
+        for author in cls.authors[:3]:
+            Follow.objects.create(user=cls.reader, author=author)
+        call_command('recount', stdout=StringIO())
+        cls.post = Post.objects.filter(author=cls.authors[0]).first()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(QueryBudgetTest.reader)
+        self.author_client = Client()
+        self.author_client.force_login(QueryBudgetTest.authors[0])
+        # Первые запросы кладут в кэш сессию и пользователя,
+        # а также автора, найденного по username.
+        for client in (self.reader_client, self.author_client):
+            client.get(reverse('index'))
+        self.author_client.get(reverse('profile', kwargs={
+            'username': QueryBudgetTest.authors[0].username}))
+
+    @contextmanager
+    def assertQueryBudget(self, name, extra=0):
+        budget = QUERY_BUDGETS[name] + extra
+        with CaptureQueriesContext(connection) as queries:
+            yield
+        executed = len(queries.captured_queries)
+        self.assertLessEqual(
+            executed, budget,
+            '%s: %s запросов при бюджете %s\n%s' % (
+                name, executed, budget, '\n'.join(
+                    query['sql'] for query in queries.captured_queries
+                )
+            )
+        )
+
+    def urls(self):
+        author = QueryBudgetTest.authors[0]
+        post = QueryBudgetTest.post
+        return {
+            'index': reverse('index'),
+            'group': reverse('group', kwargs={
+                'slug': QueryBudgetTest.groups[0].slug}),
+            'profile': reverse('profile', kwargs={
+                'username': author.username}),
+            'post': reverse('post', kwargs={
+                'username': author.username, 'post_id': post.id}),
+        }
+
+    def test_guest_pages(self):
+        for name, url in self.urls().items():
+            with self.subTest(name=name):
+                with self.assertQueryBudget(name):
+                    response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_authorized_pages(self):
+        """Для авторизованного пользователя добавляются запросы
+        сессии, пользователя и проверки подписки."""
+        urls = self.urls()
+        urls['follow_index'] = reverse('follow_index')
+        for name, url in urls.items():
+            extra = AUTH_QUERIES + (name in ('profile', 'post'))
+            with self.subTest(name=name):
+                with self.assertQueryBudget(name, extra=extra):
+                    response = self.reader_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_author_pages(self):
+        author = QueryBudgetTest.authors[0]
+        urls = {
+            'post_edit': reverse('post_edit', kwargs={
+                'username': author.username,
+                'post_id': QueryBudgetTest.post.id}),
+            'new_post': reverse('new_post'),
+        }
+        for name, url in urls.items():
+            with self.subTest(name=name):
+                with self.assertQueryBudget(name, extra=AUTH_QUERIES):
+                    response = self.author_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_deep_pages_stay_within_budget(self):
+        """Глубокие страницы ленты стоят столько же, сколько первая."""
+        url = reverse('index')
+        for _ in range(5):
+            with self.assertQueryBudget('index'):
+                response = self.guest_client.get(url)
+            url = reverse('index') + '?after=' + response.context[
+                'cursor'].after
@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def plan(sql):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def bad_steps(sql):
+    """Шаги плана с полным просмотром таблицы или сортировкой
+    во временном B-дереве."""
+    return [
+        detail for detail in plan(sql)
+        if 'TEMP B-TREE' in detail
+        or (detail.startswith('SCAN') and ' USING ' not in detail
+            and 'CONSTANT ROW' not in detail)
+    ]
+
+
+class QueryPlanTest(TestCase):
+    """Запросы страниц идут по индексам, без полного просмотра
+    таблиц и без сортировки во временном B-дереве."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='VladOs')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Группа для теста'
+        )
+        Post.objects.bulk_create(
+            Post(
+                text='Пост %s' % i,
+                author=cls.author,
+                group=cls.group if i % 2 else None
+            )
+            for i in range(30)
+        )
+        cls.post = Post.objects.filter(author=cls.author).first()
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(QueryPlanTest.reader)
+
+    def urls(self):
+        author = QueryPlanTest.author
+        return {
+            'index': reverse('index'),
+            'group': reverse('group', kwargs={
+                'slug': QueryPlanTest.group.slug}),
+            'profile': reverse('profile', kwargs={
+                'username': author.username}),
+            'post': reverse('post', kwargs={
+                'username': author.username,
+                'post_id': QueryPlanTest.post.id}),
+            'follow_index': reverse('follow_index'),
+        }
+
+    def assertIndexedQueries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            self.assertEqual(bad_steps(sql), [], sql)
+        return response
+
+    def test_pages(self):
+        for name, url in self.urls().items():
+            with self.subTest(name=name):
+                self.assertIndexedQueries(url)
+
+    def test_next_pages(self):
+        for name, url in self.urls().items():
+            if name == 'post':
+                continue
+            with self.subTest(name=name):
+                cursor = self.client.get(url).context['cursor']
+                self.assertIndexedQueries(url + '?after=' + cursor.after)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_follow_index_with_celebrities(self):
+        """Посты знаменитостей читаются своим диапазоном индекса
+        и сливаются с записями ленты."""
+        url = reverse('follow_index')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.assertIndexedQueries(url)
+        self.assertTrue(any(
+            'posts_post_author_date_idx' in detail
+            for query in queries.captured_queries
+            for detail in plan(query['sql'])
+        ))
+        # Записи ленты, оставшиеся от времени до порога, не дублируются.
+        self.assertEqual(len(set(response.context['page'])), 12)
+        self.assertIndexedQueries(url + '?after=' +
+                                  response.context['cursor'].after)
@@ -0,0 +1,90 @@
+import hashlib
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import cache as feed_cache
+from posts.models import Post
+
+User = get_user_model()
+
+
+class GetOrRecomputeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = []
+
+    def compute(self, value):
+        def compute():
+            self.calls.append(value)
+            return value
+        return compute
+
+    def get(self, value, **kwargs):
+        kwargs.setdefault('timeout', 60)
+        return feed_cache.get_or_recompute(
+            'key', self.compute(value), **kwargs)
+
+    def test_fresh_value_is_computed_once(self):
+        self.assertEqual(self.get('a', version=1), ('a', True))
+        self.assertEqual(self.get('b', version=1), ('a', True))
+        self.assertEqual(self.calls, ['a'])
+
+    def test_new_version_recomputes(self):
+        self.get('a', version=1)
+        self.assertEqual(self.get('b', version=2), ('b', True))
+
+    def test_stale_served_while_other_recomputes(self):
+        self.get('a', version=1)
+        cache.add(feed_cache.LOCK_KEY.format('key'), 1)
+        self.assertEqual(self.get('b', version=2), ('a', False))
+        self.assertEqual(self.calls, ['a'])
+        self.assertEqual(feed_cache.recompute_stats()['stale'], 1)
+
+    @mock.patch.object(feed_cache, 'LOCK_WAIT', 0.1)
+    def test_without_copy_waits_then_computes(self):
+        cache.add(feed_cache.LOCK_KEY.format('key'), 1)
+        self.assertEqual(self.get('a', version=1), ('a', True))
+        # Значение не записано: блокировка принадлежит другому.
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(feed_cache.recompute_stats()['contention'], 1)
+
+    def test_refresh_ahead_runs_in_background(self):
+        self.get('a', timeout=1, refresh_ahead=1)
+        self.assertEqual(
+            self.get('b', timeout=1, refresh_ahead=1), ('a', True))
+        # В тестах фоновые задачи выполняются сразу
+        # (BACKGROUND_TASKS_SYNC).
+        self.assertEqual(cache.get('key')['value'], 'b')
+        self.assertIsNone(cache.get(feed_cache.LOCK_KEY.format('key')))
+        self.assertEqual(feed_cache.recompute_stats()['background'], 1)
+
+
+class StaleFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        Post.objects.create(text='Старый пост', author=cls.user_author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        digest = hashlib.md5(b'').hexdigest()
+        self.lock = feed_cache.LOCK_KEY.format(f'feed_page:index:{digest}')
+
+    def test_stale_page_has_no_validators_and_is_not_cached(self):
+        self.guest_client.get(reverse('index'))
+        Post.objects.create(text='Новый пост', author=self.user_author)
+        cache.add(self.lock, 1)
+        response = self.guest_client.get(reverse('index'))
+        self.assertNotContains(response, 'Новый пост')
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('X-Page-Cache', response)
+        cache.delete(self.lock)
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Новый пост')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
@@ -0,0 +1,71 @@
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        cls.cats = Post.objects.create(
+            text='Коты и кошки, много котов',
+            author=cls.user_author
+        )
+        cls.dogs = Post.objects.create(
+            text='Собаки и один кот',
+            author=cls.user_author
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        response = self.guest_client.get(reverse('search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context.get('page'))
+
+    def test_search_finds_posts(self):
+        self.assertEqual(self.search('собаки'), [SearchTest.dogs])
+        self.assertCountEqual(
+            self.search('и'), [SearchTest.cats, SearchTest.dogs])
+
+    def test_index_follows_text_changes(self):
+        """Триггеры обновляют индекс при правке и удалении постов."""
+        post = Post.objects.get(pk=SearchTest.dogs.pk)
+        post.text = 'Хомяки'
+        post.save()
+        self.assertEqual(self.search('собаки'), [])
+        self.assertEqual(self.search('хомяки'), [post])
+        post.delete()
+        self.assertEqual(self.search('хомяки'), [])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.search('"собаки OR ('), [])
+        self.assertEqual(self.search(''), [])
+
+    def test_admin_search_uses_index(self):
+        admin = site._registry[Post]
+        request = RequestFactory().get('/')
+        queryset, _ = admin.get_search_results(
+            request, Post.objects.all(), 'кошки')
+        self.assertEqual(list(queryset), [SearchTest.cats])
+
+    def test_admin_search_finds_every_match(self):
+        extra = Post.objects.create(
+            text='Кошки спят', author=SearchTest.user_author)
+        Post.objects.create(text='Рыбки', author=SearchTest.user_author)
+        admin = site._registry[Post]
+        queryset, _ = admin.get_search_results(
+            RequestFactory().get('/'), Post.objects.all(), 'кошки')
+        self.assertCountEqual(queryset, [SearchTest.cats, extra])
+        self.client.force_login(User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'))
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошки'})
+        self.assertEqual(response.context['cl'].result_count, 2)
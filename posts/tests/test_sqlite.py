@@ -0,0 +1,38 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from posts import sqlite
+
+
+class SQLiteProfileTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        """Настройки SQLITE_PRAGMAS выставлены соединению."""
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('temp_store'), 2)
+        self.assertEqual(self.pragma('busy_timeout'), 20000)
+        self.assertEqual(self.pragma('cache_size'), -32000)
+
+
+class SQLiteMaintenanceTest(TransactionTestCase):
+    # wal_checkpoint нельзя выполнить внутри транзакции теста.
+    def test_maintenance_command(self):
+        out = StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('WAL', out.getvalue())
+
+
+class SQLiteVersionTest(SimpleTestCase):
+    def test_old_sqlite_fails_check(self):
+        self.assertEqual(sqlite.check_version(), [])
+        with mock.patch('sqlite3.sqlite_version_info', (3, 31, 1)):
+            errors = sqlite.check_version()
+        self.assertEqual([error.id for error in errors], ['posts.E001'])
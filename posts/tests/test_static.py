@@ -0,0 +1,91 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+import brotli
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+
+SOURCE = tempfile.mkdtemp()
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = b'body { color: black; }\n' * 100
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_DIRS=[SOURCE],
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder'],
+    STATICFILES_STORAGE='yatube.storage.CompressedManifestStaticFilesStorage',
+)
+class StaticPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(os.path.join(SOURCE, 'app.css'), 'wb') as file:
+            file.write(CSS)
+        with open(os.path.join(SOURCE, 'tiny.js'), 'wb') as file:
+            file.write(b'1;')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SOURCE, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.client = Client()
+        self.name = staticfiles_storage.stored_name('app.css')
+
+    def test_hashed_name_and_compressed_copies(self):
+        self.assertRegex(self.name, r'^app\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(STATIC_ROOT, self.name + '.gz'), 'rb') as gz:
+            self.assertEqual(gzip.decompress(gz.read()), CSS)
+        # Маленькие файлы не сжимаются.
+        tiny = staticfiles_storage.stored_name('tiny.js')
+        self.assertFalse(
+            os.path.exists(os.path.join(STATIC_ROOT, tiny + '.gz')))
+
+    def test_static_tag_uses_hashed_name(self):
+        rendered = Template(
+            "{% load static %}{% static 'app.css' %}").render(Context())
+        self.assertEqual(rendered, '/static/' + self.name)
+
+    def test_missing_file_keeps_name(self):
+        self.assertEqual(
+            staticfiles_storage.url('bootstrap/missing.css'),
+            '/static/bootstrap/missing.css')
+
+    def test_serves_gzip_copy(self):
+        response = self.client.get(
+            '/static/' + self.name, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(gzip.decompress(body), CSS)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_identity_without_accept_encoding(self):
+        for header in ('', 'gzip;q=0'):
+            response = self.client.get(
+                '/static/' + self.name, HTTP_ACCEPT_ENCODING=header)
+            self.assertNotIn('Content-Encoding', response)
+            self.assertEqual(b''.join(response.streaming_content), CSS)
+
+    def test_etag_differs_per_encoding(self):
+        plain = self.client.get('/static/' + self.name)['ETag']
+        compressed = self.client.get(
+            '/static/' + self.name, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        self.assertNotEqual(plain, compressed)
+
+    def test_serves_brotli_copy(self):
+        response = self.client.get(
+            '/static/' + self.name, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(brotli.decompress(body), CSS)
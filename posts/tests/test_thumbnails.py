@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import ImageVariant, Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), (255, 0, 0)).save(buffer, 'JPEG')
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.user_author,
+            image=SimpleUploadedFile('big.jpg', buffer.getvalue())
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        """Пока миниатюры нет, лента показывает заглушку
+        и не создаёт миниатюру при отрисовке."""
+        image = ThumbnailTest.post.image
+        self.assertIsNone(thumbnails.cached_thumbnail(image.name, 'card'))
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'card-img bg-light')
+        self.assertIsNone(thumbnails.cached_thumbnail(image.name, 'card'))
+
+        thumbnails.generate(image.name)
+        thumbnail = thumbnails.cached_thumbnail(image.name, 'card')
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+
+    def test_responsive_variants(self):
+        """Копии для srcset создаются один раз, карточка выводит
+        <picture> с WebP и JPEG шириной не больше оригинала."""
+        image = ThumbnailTest.post.image
+        thumbnails.generate(image.name)
+        thumbnails.generate(image.name)
+        variants = ImageVariant.objects.filter(post=ThumbnailTest.post)
+        self.assertEqual(
+            sorted(variants.values_list('width', 'height', 'format')),
+            [(width, height, variant_format)
+             for width, height in ((320, 113), (640, 226), (960, 339))
+             for variant_format in ('jpeg', 'webp')]
+        )
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, 'loading="lazy"')
+        webp = variants.get(width=320, format='webp')
+        self.assertContains(response, webp.image.url + ' 320w')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class VariantFilesTest(TransactionTestCase):
+    def test_files_removed_with_last_variant(self):
+        """Файлы копий удаляются вместе с последней записью,
+        которая на них ссылается."""
+        author = User.objects.create(username='VladOs')
+        buffer = BytesIO()
+        Image.new('RGB', (400, 300), (255, 0, 0)).save(buffer, 'JPEG')
+        post = Post.objects.create(
+            text='Пост', author=author,
+            image=SimpleUploadedFile('photo.jpg', buffer.getvalue())
+        )
+        twin = Post.objects.create(
+            text='Копия', author=author, image=post.image.name)
+        thumbnails.generate_variants(post.image.name)
+        names = set(ImageVariant.objects.values_list('image', flat=True))
+        self.assertTrue(names)
+        post.delete()
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+        twin.delete()
+        self.assertFalse(any(default_storage.exists(name) for name in names))
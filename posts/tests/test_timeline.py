@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts import follows
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create(username='VladOs')
+        cls.old_post = Post.objects.create(
+            text='Старый пост',
+            author=cls.user_author
+        )
+
+    def setUp(self):
+        self.user = User.objects.create(username='reader')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('follow_index'))
+        return list(response.context.get('page'))
+
+    def test_follow_backfills_timeline(self):
+        """Подписка подтягивает уже опубликованные посты автора."""
+        Follow.objects.create(user=self.user, author=self.user_author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=TimelineTest.old_post).exists())
+        self.assertEqual(self.feed(), [TimelineTest.old_post])
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков при публикации."""
+        Follow.objects.create(user=self.user, author=self.user_author)
+        post = Post.objects.create(text='Новый пост', author=self.user_author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=post).exists())
+        self.assertEqual(self.feed(), [post, TimelineTest.old_post])
+
+    def test_unfollow_prunes_timeline(self):
+        Follow.objects.create(user=self.user, author=self.user_author)
+        Follow.objects.filter(user=self.user).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_posts_read_on_the_fly(self):
+        """Посты авторов с большим числом подписчиков не раскладываются
+        по лентам, но всё равно видны в ленте подписок."""
+        Follow.objects.create(user=self.user, author=self.user_author)
+        post = Post.objects.create(text='Новый пост', author=self.user_author)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed(), [post, TimelineTest.old_post])
+
+    def test_celebrity_pages_merge_without_duplicates(self):
+        """Посты знаменитости сливаются с её старыми записями в ленте,
+        курсоры листают склеенную ленту в обе стороны."""
+        other = User.objects.create(username='other')
+        Follow.objects.create(user=self.user, author=self.user_author)
+        Follow.objects.create(user=self.user, author=other)
+        posts = [TimelineTest.old_post] + [
+            Post.objects.create(text=f'Пост {i}', author=author)
+            for i in range(14) for author in (self.user_author, other)
+        ]
+        expected = sorted(posts, key=lambda post: (post.pub_date, post.pk),
+                          reverse=True)
+        with self.settings(TIMELINE_FANOUT_LIMIT=0):
+            response = self.authorized_client.get(reverse('follow_index'))
+            seen = list(response.context['page'])
+            while response.context['cursor'].after:
+                response = self.authorized_client.get(
+                    reverse('follow_index'),
+                    {'after': response.context['cursor'].after})
+                seen.extend(response.context['page'])
+            self.assertEqual(seen, expected)
+            response = self.authorized_client.get(
+                reverse('follow_index'),
+                {'before': response.context['cursor'].before})
+            self.assertEqual(list(response.context['page']), expected[12:24])
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.user, author=self.user_author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.feed(), [TimelineTest.old_post])
+
+
+class FanoutLimitTest(TransactionTestCase):
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_author_back_under_limit_is_fanned_out(self):
+        """Посты, вышедшие, пока автор читался на лету, попадают
+        в ленты, когда подписчиков снова становится не больше порога."""
+        author = User.objects.create(username='VladOs')
+        reader, other = (User.objects.create(username=name)
+                         for name in ('reader', 'other'))
+        follows.follow(reader, [author.pk])
+        follows.follow(other, [author.pk])
+        post = Post.objects.create(text='Пост знаменитости', author=author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        follows.unfollow(other, [author.pk])
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(reader.pk, post.pk)])
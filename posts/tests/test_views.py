@@ -59,6 +59,7 @@ class ViewTest(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create(username='author')
         self.authorized_client = Client()
@@ -228,24 +229,40 @@ class ViewTest(TestCase):
         )
 
     def test_cache(self):
-        """Тест кэша """
+        """Тест кэша: без изменений лента отдаётся из кэша,
+        новый пост сразу сбрасывает закэшированный фрагмент."""
+        cache.clear()
         html_0 = self.guest_client.get('/')
-        Post.objects.create(
-            text='Труляля',
-            author=ViewTest.user_author,
-            group=ViewTest.group
-        )
+        Post.objects.filter(pk=ViewTest.post.pk).update(text='Тихая правка')
         html_1 = self.guest_client.get('/')
         self.assertHTMLEqual(
             str(html_0.content),
             str(html_1.content),
             )
-        cache.clear()
+        Post.objects.create(
+            text='Труляля',
+            author=ViewTest.user_author,
+            group=ViewTest.group
+        )
         html_2 = self.guest_client.get('/')
         self.assertHTMLNotEqual(
             str(html_0.content),
             str(html_2.content),
             )
+        self.assertContains(html_2, 'Труляля')
+
+    def test_cache_is_page_aware(self):
+        """Разные страницы ленты кэшируются под разными ключами."""
+        cache.clear()
+        Post.objects.bulk_create(
+            Post(author=ViewTest.user_author, text='Пост %s' % i)
+            for i in range(POSTS_PER_PAGE)
+        )
+        first_page = self.guest_client.get(reverse('index'))
+        second_page = self.guest_client.get(reverse('index') + '?page=2')
+        anchor = f'name="post_{ViewTest.post.id}"'
+        self.assertNotContains(first_page, anchor)
+        self.assertContains(second_page, anchor)
 
     def test_follow(self):
         """Тест подписок."""
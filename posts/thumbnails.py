@@ -0,0 +1,131 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import background, images
+from .cache import bump_version, post_scopes
+from .middleware import timed
+from .models import ImageVariant, Post
+
+logger = logging.getLogger(__name__)
+
+_in_flight = set()
+_lock = threading.Lock()
+
+
+def geometries():
+    """Размеры миниатюр постов: имя -> (геометрия, опции sorl)."""
+    return getattr(settings, 'POST_THUMBNAIL_GEOMETRIES', {})
+
+
+def _thumbnail_options(source, options):
+    # Повторяет нормализацию опций ThumbnailBackend.get_thumbnail,
+    # чтобы получить то же имя файла миниатюры.
+    backend = default.backend
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def cached_thumbnail(name, geometry):
+    """Готовая миниатюра из хранилища ключей sorl или None.
+    Сама миниатюра при этом не создаётся."""
+    geometry_string, options = geometries()[geometry]
+    source = ImageFile(name)
+    options = _thumbnail_options(source, options)
+    thumbnail = ImageFile(
+        default.backend._get_thumbnail_filename(
+            source, geometry_string, options),
+        default.storage
+    )
+    return default.kvstore.get(thumbnail)
+
+
+def generate_variants(name):
+    """Создаёт копии для srcset всем постам с этой картинкой,
+    у которых их ещё нет."""
+    posts = Post.objects.filter(
+        image=name, image_variants__isnull=True
+    ).values_list('pk', flat=True)
+    if not posts.exists():
+        return
+    with default_storage.open(name) as file:
+        variants = images.make_variants(file)
+    field = ImageVariant._meta.get_field('image')
+    rows = []
+    for width, height, variant_format, content in variants:
+        stored = default_storage.save(
+            field.generate_filename(None, content.name), content
+        )
+        rows.extend(
+            ImageVariant(
+                post_id=pk,
+                image=stored,
+                width=width,
+                height=height,
+                format=variant_format
+            )
+            for pk in posts
+        )
+    ImageVariant.objects.bulk_create(rows)
+
+
+def delete_variant_file(name):
+    """Удаляет файл копии для srcset, если на него больше не ссылается
+    ни одна запись: посты с одной картинкой делят одни копии."""
+    if name and not ImageVariant.objects.filter(image=name).exists():
+        default_storage.delete(name)
+
+
+def generate(name):
+    with timed('thumbnail_time'):
+        for geometry_string, options in geometries().values():
+            get_thumbnail(name, geometry_string, **options)
+        generate_variants(name)
+    # Закэшированные фрагменты лент всё ещё показывают заглушку.
+    scopes = set()
+    for pk, author_id, group_id in Post.objects.filter(
+            image=name).values_list('pk', 'author_id', 'group_id'):
+        scopes.add(f'post:{pk}')
+        scopes.update(post_scopes(author_id, group_id))
+    bump_version(*scopes)
+
+
+def _run(name):
+    try:
+        generate(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+    finally:
+        with _lock:
+            _in_flight.discard(name)
+
+
+def _submit(name):
+    with _lock:
+        if name in _in_flight:
+            return
+        _in_flight.add(name)
+    background.submit(
+        'thumbnails', getattr(settings, 'THUMBNAIL_WORKERS', 2), _run, name)
+
+
+def enqueue(image):
+    """Ставит создание всех миниатюр картинки в фоновый пул
+    после фиксации текущей транзакции."""
+    if image:
+        transaction.on_commit(lambda: _submit(image.name))
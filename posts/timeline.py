@@ -0,0 +1,186 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import background
+from .models import Follow, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+
+
+def fanout_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_LIMIT', 5000)
+
+
+def is_celebrity(author_id):
+    """Автор с огромным числом подписчиков не раскладывается
+    по лентам, его посты читаются при показе ленты."""
+    return UserStats.objects.filter(
+        user_id=author_id, follower_count__gt=fanout_limit()
+    ).exists()
+
+
+def celebrities_followed_by(user):
+    return Follow.objects.filter(
+        user=user, author__stats__follower_count__gt=fanout_limit()
+    ).values('author')
+
+
+def _bulk_insert(entries):
+    for start in range(0, len(entries), BATCH_SIZE):
+        TimelineEntry.objects.bulk_create(
+            entries[start:start + BATCH_SIZE], ignore_conflicts=True
+        )
+
+
+def fan_out(post):
+    """Добавляет пост в ленты всех подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert([
+        TimelineEntry(
+            user_id=user_id,
+            post=post,
+            author_id=post.author_id,
+            pub_date=post.pub_date
+        )
+        for user_id in followers.iterator()
+    ])
+
+
+def backfill(user_id, author_id):
+    """Подтягивает в ленту последние TIMELINE_BACKFILL постов автора
+    после подписки; более старые в ленту подписок не попадают."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'id', 'pub_date'
+    )[:getattr(settings, 'TIMELINE_BACKFILL', 1000)]
+    _bulk_insert([
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date
+        )
+        for post_id, pub_date in posts
+    ])
+
+
+AUTHOR_BACKFILL_SQL = """
+    {insert} posts_timelineentry (user_id, post_id, author_id, pub_date)
+    SELECT f.user_id, p.id, p.author_id, p.pub_date
+    FROM posts_follow f, (
+        SELECT id, author_id, pub_date FROM posts_post
+        WHERE author_id = %s ORDER BY pub_date DESC, id DESC LIMIT %s
+    ) p
+    WHERE f.author_id = %s
+"""
+
+
+def backfill_followers(author_id):
+    """Раскладывает последние TIMELINE_BACKFILL постов автора по лентам
+    всех его подписчиков одним INSERT ... SELECT; уже разложенные
+    пропускаются."""
+    with connection.cursor() as cursor:
+        cursor.execute(AUTHOR_BACKFILL_SQL.format(
+            insert=connection.ops.insert_statement(ignore_conflicts=True)
+        ), [author_id, getattr(settings, 'TIMELINE_BACKFILL', 1000),
+            author_id])
+
+
+def followers_lost(author_ids):
+    """Вызывается после отписки от авторов. Тот, у кого подписчиков
+    стало ровно TIMELINE_FANOUT_LIMIT, снова раскладывается по лентам:
+    посты, вышедшие, пока он читался на лету, дописываются в ленты
+    подписчиков в фоне после фиксации транзакции. Обратный переход
+    ничего не требует: посты знаменитостей читаются на лету, а их
+    старые записи в лентах склеиваются с ними при чтении."""
+    crossed = UserStats.objects.filter(
+        user_id__in=author_ids, follower_count=fanout_limit()
+    ).values_list('user_id', flat=True)
+    for author_id in crossed:
+        transaction.on_commit(partial(
+            background.submit, 'timelines', 1, backfill_followers, author_id
+        ))
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты после отписки."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def followed_entries(user):
+    """Записи ленты подписок. Порядок (-pub_date, -post) совпадает
+    с индексом posts_timeline_user_date_idx, поэтому страница читается
+    без сортировки; годится, пока среди подписок нет знаменитостей."""
+    return TimelineEntry.objects.filter(user=user).order_by(
+        '-pub_date', '-post'
+    )
+
+
+def celebrity_posts(user):
+    """По queryset на каждого автора из подписок, которого не
+    раскладывают по лентам: каждый читается одним диапазоном
+    индекса posts_post_author_date_idx."""
+    return [
+        Post.objects.filter(author_id=author_id)
+        for author_id in celebrities_followed_by(user).values_list(
+            'author', flat=True)
+    ]
+
+
+def followed_posts(user):
+    """Посты ленты подписок одним запросом: готовые записи из
+    TimelineEntry плюс посты авторов, которых не раскладывали
+    по лентам. Нужен только Paginator для ссылок ?page=N."""
+    entries = TimelineEntry.objects.filter(user=user).values('post_id')
+    return Post.objects.filter(
+        Q(pk__in=entries) | Q(author__in=celebrities_followed_by(user))
+    )
+
+
+REBUILD_SQL = """
+    {insert} posts_timelineentry (user_id, post_id, author_id, pub_date)
+    SELECT f.user_id, p.id, p.author_id, p.pub_date
+    FROM posts_follow f
+    JOIN (
+        SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+            PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+        ) AS position
+        FROM posts_post
+    ) p ON p.author_id = f.author_id AND p.position <= %s
+    LEFT JOIN posts_userstats s ON s.user_id = f.author_id
+    WHERE COALESCE(s.follower_count, 0) <= %s {users}
+"""
+
+
+def rebuild(users=None):
+    """Пересобирает ленты заданных пользователей (по умолчанию всех,
+    у кого есть подписки) одним INSERT ... SELECT.
+    Возвращает число созданных записей."""
+    params = [getattr(settings, 'TIMELINE_BACKFILL', 1000), fanout_limit()]
+    users_sql = ''
+    entries = TimelineEntry.objects.all()
+    if users is not None:
+        user_ids = User.objects.filter(pk__in=users).values('pk')
+        subquery, user_params = user_ids.query.sql_with_params()
+        users_sql = f'AND f.user_id IN ({subquery})'
+        params.extend(user_params)
+        entries = entries.filter(user__in=user_ids)
+    with transaction.atomic():
+        entries.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(REBUILD_SQL.format(
+                insert=connection.ops.insert_statement(),
+                users=users_sql
+            ), params)
+    return entries.count()
@@ -9,6 +9,9 @@ urlpatterns = [
     path('404/', views.page_not_found, name='404'),
     path('500/', views.server_error, name='500'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
+    path('search/', views.search, name='search'),
+    path('export/', views.export_content, name='export'),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path(
@@ -16,6 +19,11 @@ urlpatterns = [
         views.post_edit,
         name='post_edit'
     ),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         '<username>/<int:post_id>/comment/',
         views.add_comment, name='add_comment'),
@@ -1,91 +1,206 @@
+import hashlib
+import json
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.paginator import Page, Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.http import require_POST
 
+from . import counters, export, follows, thumbnails, timeline
+from .cache import feed_cache_options, get_or_recompute
+from .conditional import Freshness
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post
+from .lookups import group_or_404, user_or_404
+from .models import Comment, Follow, Post, TimelineEntry
+from .pagination import paginate, paginate_merged
+from .search import search_posts
 
 User = get_user_model()
 
-
 POSTS_PER_PAGE = 12
+COMMENTS_PER_PAGE = 20
+FOLLOW_BULK_LIMIT = 100
+
+
+def feed_page(request, scope, version, queryset):
+    """Страница ленты через get_or_recompute: после записи в ленту
+    её пересчитывает один запрос, а не все одновременно.
+    Старые ссылки ?page=N читаются из базы напрямую."""
+    if 'page' in request.GET:
+        return paginate(request, queryset, POSTS_PER_PAGE)
+
+    def compute():
+        _, page, cursor = paginate(request, queryset, POSTS_PER_PAGE)
+        return list(page.object_list), cursor
+
+    digest = hashlib.md5(request.GET.urlencode().encode()).hexdigest()
+    (items, cursor), fresh = get_or_recompute(
+        f'feed_page:{scope}:{digest}', compute, version=version,
+        **feed_cache_options()
+    )
+    if not fresh:
+        request.served_stale = True
+    paginator = Paginator(queryset, POSTS_PER_PAGE)
+    return paginator, Page(items, 1, paginator), cursor
 
 
 def index(request):
-    post_list = Post.objects.select_related('group')
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(
+    freshness = Freshness(request, 'index')
+    response = freshness.not_modified()
+    if response is not None:
+        return response
+    post_list = Post.objects.select_related(
+        'author', 'group'
+    ).prefetch_related('image_variants')
+    version = freshness.versions['index']
+    paginator, page, cursor = feed_page(request, 'index', version, post_list)
+    return freshness.apply(render(
         request,
-        'index.html', {'page': page, 'paginator': paginator}
-    )
+        'index.html', {
+            'page': page,
+            'paginator': paginator,
+            'cursor': cursor,
+            'feed_version': version}
+    ))
 
 
 def group_posts(request, slug):
     """Функция возвращает страницу сообщества
     и выводит до 12 записей на странице."""
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'group.html', {
-        'posts_quantity': paginator.count,
+    group = group_or_404(slug)
+    scope = f'group:{group.pk}'
+    freshness = Freshness(request, scope)
+    response = freshness.not_modified()
+    if response is not None:
+        return response
+    posts = group.posts.select_related(
+        'author', 'group'
+    ).prefetch_related('image_variants')
+    version = freshness.versions[scope]
+    paginator, page, cursor = feed_page(request, scope, version, posts)
+    return freshness.apply(render(request, 'group.html', {
         'group': group,
         'posts': posts,
         'page': page,
-        'paginator': paginator}
+        'paginator': paginator,
+        'cursor': cursor,
+        'feed_version': version}
+    ))
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results = search_posts(
+        query,
+        Post.objects.select_related(
+            'author', 'group'
+        ).prefetch_related('image_variants')
+    ) if query else Post.objects.none()
+    paginator = Paginator(results, POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, 'search.html', {
+        'query': query,
+        'page': page,
+        'paginator': paginator,
+        'cursor': None}
     )
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = user_or_404(username)
+    scope = f'author:{author.pk}'
+    freshness = Freshness(request, scope)
+    response = freshness.not_modified()
+    if response is not None:
+        return response
+    stats = counters.stats_for(author)
+    post_list = author.posts.select_related(
+        'group'
+    ).prefetch_related('image_variants')
+    version = freshness.versions[scope]
+    paginator, page, cursor = feed_page(request, scope, version, post_list)
     is_following = False
     if request.user.is_authenticated:
         is_following = Follow.objects.filter(
             user=request.user,
             author=author).exists()
-    followers = author.following.count()
-    follows = author.follower.count()
-    return render(request, 'profile.html', {
-        'posts_quantity': paginator.count,
+    return freshness.apply(render(request, 'profile.html', {
+        'posts_quantity': stats.post_count,
         'page': page,
         'author': author,
         'paginator': paginator,
+        'cursor': cursor,
+        'feed_version': version,
         'following': is_following,
-        'followers': followers,
-        'follows': follows}
-    )
+        'followers': stats.follower_count,
+        'follows': stats.following_count}
+    ))
+
+
+def post_comment_list(post_id):
+    return Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).order_by('created')
 
 
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    comments = Comment.objects.filter(post_id=post_id)
+    author = user_or_404(username)
+    freshness = Freshness(request, f'post:{post_id}', f'author:{author.pk}')
+    response = freshness.not_modified()
+    if response is not None:
+        return response
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        id=post_id,
+        author=author
+    )
+    _, comment_page, comment_cursor = paginate(
+        request, post_comment_list(post_id), COMMENTS_PER_PAGE,
+        field='created', descending=False
+    )
     form = CommentForm()
-    posts_quantity = post.author.posts.all().count
+    stats = counters.stats_for(post.author)
     following = False
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user,
             author=post.author).exists()
-    followers = Follow.objects.filter(author=post.author).count()
-    follows = Follow.objects.filter(user=post.author).count()
-    return render(request, 'post.html', {
+    return freshness.apply(render(request, 'post.html', {
         'form': form,
         'author': post.author,
         'post': post,
-        'posts_quantity': posts_quantity,
-        'comments': comments,
+        'posts_quantity': stats.post_count,
+        'comment_page': comment_page,
+        'comment_cursor': comment_cursor,
+        'post_url': request.path,
+        'comments_url': reverse('post_comments', kwargs={
+            'username': username, 'post_id': post_id}),
         'following': following,
-        'followers': followers,
-        'follows': follows}
+        'followers': stats.follower_count,
+        'follows': stats.following_count}
+    ))
+
+
+def post_comments(request, username, post_id):
+    """Следующая страница комментариев HTML-фрагментом
+    для подгрузки на странице поста."""
+    author = user_or_404(username)
+    if not Post.objects.filter(id=post_id, author=author).exists():
+        raise Http404('No Post matches the given query.')
+    _, page, cursor = paginate(
+        request, post_comment_list(post_id), COMMENTS_PER_PAGE,
+        field='created', descending=False
+    )
+    return render(request, 'includes/comment_list.html', {
+        'comment_page': page,
+        'comment_cursor': cursor,
+        'post_url': reverse('post', kwargs={
+            'username': username, 'post_id': post_id}),
+        'comments_url': request.path}
     )
 
 
@@ -99,14 +214,17 @@ def new_post(request):
         return render(request, 'new.html', {'form': form, 'is_edit': False})
     post = form.save(commit=False)
     post.author = request.user
-    form.save()
+    with transaction.atomic():
+        form.save()
+        thumbnails.enqueue(post.image)
     return redirect('index')
 
 
 @login_required
 def post_edit(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    author = post.author
+    author = user_or_404(username)
+    post = get_object_or_404(Post, id=post_id, author=author)
+    post.author = author
     if request.user != author:
         return redirect(reverse('index'))
     form = PostForm(
@@ -121,7 +239,9 @@ def post_edit(request, username, post_id):
             'post': post}
         )
     post = form.save(commit=False)
-    form.save()
+    with transaction.atomic():
+        form.save()
+        thumbnails.enqueue(post.image)
     return redirect('post', username=username, post_id=post_id)
 
 
@@ -140,41 +260,132 @@ def server_error(request):
 
 @login_required
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
+    post = get_object_or_404(
+        Post, id=post_id, author=user_or_404(username)
+    )
     form = CommentForm(request.POST or None)
     if request.method == 'GET' or not form.is_valid():
         return render(request, 'post.html', {'form': form})
     comment = form.save(commit=False)
     comment.author = request.user
     comment.post = post
-    form.save()
+    with transaction.atomic():
+        form.save()
     return redirect('post', username=username, post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    entries = timeline.followed_entries(request.user).select_related(
+        'post__author', 'post__group'
+    ).prefetch_related('post__image_variants')
+    celebrities = timeline.celebrity_posts(request.user)
+    if celebrities:
+        # Записи ленты и посты каждой знаменитости читаются отдельными
+        # диапазонами индексов и сливаются в одну страницу.
+        sources = [(entries, 'post_id')] + [
+            (posts.select_related('author', 'group').prefetch_related(
+                'image_variants'), 'pk')
+            for posts in celebrities
+        ]
+        post_list = timeline.followed_posts(request.user).select_related(
+            'author', 'group'
+        ).prefetch_related('image_variants')
+        paginator, page, cursor = paginate_merged(
+            request, sources, POSTS_PER_PAGE,
+            Paginator(post_list, POSTS_PER_PAGE)
+        )
+    else:
+        paginator, page, cursor = paginate(
+            request, entries, POSTS_PER_PAGE, key='post_id'
+        )
+    page.object_list = [
+        item.post if isinstance(item, TimelineEntry) else item
+        for item in page.object_list
+    ]
     return render(request, 'follow.html', {
         'page': page,
-        'paginator': paginator}
+        'paginator': paginator,
+        'cursor': cursor}
     )
 
 
+def follow_response(request, author, following):
+    """Редирект на профиль автора, а для запросов с Accept:
+    application/json — состояние подписки и новые счётчики."""
+    if 'application/json' not in request.META.get('HTTP_ACCEPT', ''):
+        return redirect('profile', username=author.username)
+    counts = follows.follow_counts(author.pk, request.user.pk)
+    return JsonResponse({
+        'following': following,
+        'followers': counts.get(author.pk, {}).get('followers', 0),
+        'follows': counts.get(request.user.pk, {}).get('follows', 0),
+    })
+
+
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if request.user != author and not Follow.objects.filter(
-        user=request.user, author=author
-    ).exists():
-        Follow.objects.create(user=request.user, author=author)
-    return profile(request, username)
+    author = user_or_404(username)
+    follows.follow(request.user, [author.pk])
+    return follow_response(request, author, request.user != author)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
-    return profile(request, username)
+    author = user_or_404(username)
+    follows.unfollow(request.user, [author.pk])
+    return follow_response(request, author, False)
+
+
+@login_required
+@require_POST
+def follow_bulk(request):
+    """Подписка сразу на несколько авторов, например при регистрации.
+    Имена передаются полями username формы или JSON
+    {"usernames": [...]}; в ответе — на кого подписка создана,
+    какие имена не найдены и новое число подписок."""
+    if request.content_type == 'application/json':
+        try:
+            usernames = json.loads(request.body)['usernames']
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({'error': 'Ожидается {"usernames": [...]}'},
+                                status=400)
+    else:
+        usernames = request.POST.getlist('username')
+    if (not isinstance(usernames, list)
+            or not all(isinstance(name, str) for name in usernames)):
+        return JsonResponse({'error': 'usernames — список строк'},
+                            status=400)
+    usernames = set(usernames)
+    if len(usernames) > FOLLOW_BULK_LIMIT:
+        return JsonResponse(
+            {'error': f'Не больше {FOLLOW_BULK_LIMIT} авторов за раз'},
+            status=400
+        )
+    authors = dict(User.objects.filter(
+        username__in=usernames).values_list('pk', 'username'))
+    created = follows.follow(request.user, authors)
+    counts = follows.follow_counts(request.user.pk)
+    return JsonResponse({
+        'followed': sorted(authors[pk] for pk in created),
+        'unknown': sorted(usernames - set(authors.values())),
+        'follows': counts.get(request.user.pk, {}).get('follows', 0),
+    })
+
+
+@login_required
+def export_content(request):
+    """Выгрузка постов и комментариев пользователя: ?format=ndjson
+    (по умолчанию), csv или zip с картинками. Ответ отдаётся
+    потоком, память не зависит от числа постов."""
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in export.FORMATS:
+        raise Http404('Неизвестный формат выгрузки')
+    response = StreamingHttpResponse(
+        export.export(request.user, export_format),
+        content_type=export.FORMATS[export_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{request.user.username}.{export_format}"'
+    )
+    return response
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
+from django.urls import resolve, reverse
 
 User = get_user_model()
 
@@ -8,3 +10,12 @@ class CreationForm(UserCreationForm):
     class Meta():
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        # Профиль живёт по адресу /<username>/: имя вроде search или
+        # follow совпало бы с другой страницей, и профиль был бы закрыт.
+        path = reverse('profile', kwargs={'username': username})
+        if resolve(path).url_name != 'profile':
+            raise ValidationError('Это имя занято адресом страницы сайта.')
+        return username
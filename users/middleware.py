@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+USER_KEY = 'auth_user:{}'
+
+
+def user_cache_key(user_id):
+    return USER_KEY.format(user_id)
+
+
+def _load_user(request):
+    try:
+        user_id = auth._get_user_session_key(request)
+    except KeyError:
+        return AnonymousUser()
+    backend_path = request.session.get(auth.BACKEND_SESSION_KEY)
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    key = user_cache_key(user_id)
+    cached = cache.get(key)
+    # Хэш в сессии зависит от пароля: после его смены закэшированный
+    # пользователь не подходит, и проверка идёт обычным путём. Так же,
+    # как auth.get_user, бэкенд сессии должен быть в настройках.
+    if (cached is not None and session_hash
+            and backend_path in settings.AUTHENTICATION_BACKENDS
+            and cached[0] == backend_path
+            and constant_time_compare(cached[1], session_hash)):
+        return cached[2]
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(
+            key, (backend_path, user.get_session_auth_hash(), user),
+            getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300)
+        )
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = _load_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, который берёт пользователя из кэша
+    по id из сессии и сверяет хэш сессии. Запись удаляется при
+    сохранении или удалении пользователя (users.signals)."""
+
+    def process_request(self, request):
+        request.user = SimpleLazyObject(lambda: get_user(request))
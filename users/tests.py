@@ -1,3 +1,61 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .forms import CreationForm
+
+User = get_user_model()
+
+
+class CachedAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='VladOs', password='secret-password')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('follow_index')
+
+    def test_session_and_user_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            # Только проверка подписок на знаменитостей и лента.
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_profile_change_refreshes_user(self):
+        self.client.get(self.url)
+        self.user.first_name = 'Влад'
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].first_name, 'Влад')
+
+    def test_password_change_logs_out(self):
+        self.client.get(self.url)
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_removed_backend_logs_out(self):
+        self.client.get(self.url)
+        with override_settings(AUTHENTICATION_BACKENDS=[
+                'django.contrib.auth.backends.AllowAllUsersModelBackend']):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+
+class CreationFormTest(TestCase):
+    def form(self, username):
+        return CreationForm({
+            'username': username,
+            'password1': 'secret-password-1',
+            'password2': 'secret-password-1',
+        })
+
+    def test_username_shadowed_by_page_is_rejected(self):
+        for username in ('search', 'follow', 'new', 'export'):
+            with self.subTest(username=username):
+                self.assertIn('username', self.form(username).errors)
+        self.assertTrue(self.form('VladOs').is_valid())
@@ -0,0 +1,305 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cache (
+        key TEXT PRIMARY KEY,
+        value BLOB,
+        size INTEGER NOT NULL,
+        expires REAL,
+        accessed REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+    CREATE TABLE IF NOT EXISTS stats (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+"""
+
+STATS = ('hits', 'misses', 'evictions')
+
+
+def _dump(value):
+    # Целые числа хранятся как есть, чтобы incr был одним UPDATE.
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _load(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+def _size(value):
+    return len(value) if isinstance(value, bytes) else 8
+
+
+def _private_file(path):
+    # Значения — pickle, среди них сессии: файл должен принадлежать
+    # этому пользователю и быть закрыт для остальных. Файлы -wal
+    # и -shm SQLite создаёт с теми же правами.
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, 0o700, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+    try:
+        info = os.fstat(fd)
+        if info.st_uid != os.geteuid():
+            raise ImproperlyConfigured(
+                f'Файл кэша {path} принадлежит другому пользователю')
+        if info.st_mode & 0o077:
+            os.fchmod(fd, 0o600)
+    finally:
+        os.close(fd)
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в файле SQLite, общий для всех процессов на одной машине.
+
+    Вытеснение — приблизительный LRU: время обращения обновляется
+    не чаще раза в LRU_RESOLUTION секунд, а при превышении
+    MAX_ENTRIES или MAX_BYTES удаляются давно не читанные ключи.
+    Проверка размера идёт раз в CULL_EVERY записей, счётчики
+    попаданий копятся в процессе и сбрасываются в файл пачками.
+    Файл создаётся с правами 0600; чужой файл не открывается.
+    Нужен SQLite 3.35 или новее (UPSERT и RETURNING).
+
+        CACHES = {'default': {
+            'BACKEND': 'yatube.cache.SQLiteCache',
+            'LOCATION': '/srv/yatube/cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 50000, 'MAX_BYTES': 256 * 2 ** 20},
+        }}
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self.max_bytes = int(options.get('MAX_BYTES', 0)) or None
+        self.lru_resolution = float(options.get('LRU_RESOLUTION', 10))
+        self.cull_every = int(options.get('CULL_EVERY', 100))
+        self.stats_every = int(options.get('STATS_EVERY', 100))
+        self._local = threading.local()
+        self._pending = dict.fromkeys(STATS, 0)
+        self._writes = 0
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока и заново открывается
+        # в дочернем процессе после fork.
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            _private_file(self.location)
+            db = sqlite3.connect(
+                self.location, timeout=30, isolation_level=None,
+                check_same_thread=False
+            )
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = NORMAL')
+            db.executescript(SCHEMA)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _count(self, name, amount=1):
+        self._pending[name] += amount
+        if sum(self._pending.values()) >= self.stats_every:
+            self._flush_stats()
+
+    def _flush_stats(self):
+        pending, self._pending = self._pending, dict.fromkeys(STATS, 0)
+        self._db.executemany(
+            'INSERT INTO stats (name, value) VALUES (?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+            [(name, value) for name, value in pending.items() if value]
+        )
+
+    def _fetch(self, keys):
+        now = time.time()
+        marks = ','.join('?' * len(keys))
+        rows = self._db.execute(
+            f'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({marks})', keys
+        ).fetchall()
+        found, stale = {}, []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[key] = _load(value)
+            if now - accessed > self.lru_resolution:
+                stale.append(key)
+        if stale:
+            marks = ','.join('?' * len(stale))
+            self._db.execute(
+                f'UPDATE cache SET accessed = ? WHERE key IN ({marks})',
+                [now, *stale]
+            )
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return found
+
+    def _store(self, items, timeout, only_new=False):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = []
+        for key, value in items:
+            value = _dump(value)
+            rows.append((key, value, _size(value), expires, now))
+        sql = (
+            'INSERT INTO cache (key, value, size, expires, accessed) '
+            'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, size = excluded.size, '
+            'expires = excluded.expires, accessed = excluded.accessed'
+        )
+        if only_new:
+            sql += ' WHERE cache.expires IS NOT NULL AND cache.expires <= ?'
+            rows = [row + (now,) for row in rows]
+        with self._transaction() as db:
+            cursor = db.executemany(sql, rows)
+        self._writes += len(rows)
+        if self._writes >= self.cull_every:
+            self._writes = 0
+            self._cull()
+        return cursor.rowcount
+
+    def _cull(self):
+        with self._transaction() as db:
+            db.execute(
+                'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+                [time.time()]
+            )
+            count, size = db.execute(
+                'SELECT count(*), coalesce(sum(size), 0) FROM cache'
+            ).fetchone()
+            excess = 0
+            if count > self._max_entries:
+                excess = count - self._max_entries + (
+                    self._max_entries // self._cull_frequency
+                    if self._cull_frequency else 0
+                )
+            if self.max_bytes and size > self.max_bytes:
+                # Средний размер записи даёт, сколько ключей убрать,
+                # чтобы освободить четверть лимита сверх превышения.
+                average = size / count
+                target = size - self.max_bytes + self.max_bytes // 4
+                excess = max(excess, int(target / average) + 1)
+            if excess:
+                db.execute(
+                    'DELETE FROM cache WHERE key IN ('
+                    'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                    [excess]
+                )
+        if excess:
+            self._count('evictions', excess)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._fetch([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        found = self._fetch(list(keys))
+        return {keys[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store([(self._key(key, version), value)], timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store(
+            [(self._key(key, version), value) for key, value in data.items()],
+            timeout
+        )
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self._store(
+            [(self._key(key, version), value)], timeout, only_new=True
+        ))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            [self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()]
+        )
+        return bool(cursor.rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        # Один UPDATE атомарен и между процессами.
+        row = self._db.execute(
+            "UPDATE cache SET value = value + ? WHERE key = ? "
+            "AND typeof(value) = 'integer' "
+            "AND (expires IS NULL OR expires > ?) RETURNING value",
+            [delta, self._key(key, version), time.time()]
+        ).fetchone()
+        if row is None:
+            # Отсутствующий ключ или нечисловое значение.
+            value = self.get(key, version=version)
+            if value is None:
+                raise ValueError("Key '%s' not found" % key)
+            value += delta
+            self.set(key, value, version=version)
+            return value
+        return row[0]
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ?', [self._key(key, version)])
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            marks = ','.join('?' * len(keys))
+            self._db.execute(
+                f'DELETE FROM cache WHERE key IN ({marks})', keys)
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            [self._key(key, version), time.time()]
+        ).fetchone() is not None
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute('DELETE FROM cache')
+            db.execute('DELETE FROM stats')
+        self._pending = dict.fromkeys(STATS, 0)
+
+    def stats(self):
+        """Попадания, промахи и вытеснения всех процессов
+        и текущий размер кэша."""
+        self._flush_stats()
+        result = dict.fromkeys(STATS, 0)
+        result.update(self._db.execute('SELECT name, value FROM stats'))
+        result['entries'], result['bytes'] = self._db.execute(
+            'SELECT count(*), coalesce(sum(size), 0) FROM cache'
+        ).fetchone()
+        return result
@@ -0,0 +1,226 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, patch_vary_headers)
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+# Имена с хэшем содержимого: миниатюры sorl (cache/ab/cd/<md5>.jpg)
+# и файлы ManifestStaticFilesStorage (name.<12 hex>.ext).
+HASHED_NAME = re.compile(
+    r'(?:^|/)[0-9a-f]{32}\.\w+$|\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Готовые сжатые копии рядом с файлом (yatube.storage), лучшая первой.
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+ENCODED_TYPES = {
+    'bzip2': 'application/x-bzip',
+    'gzip': 'application/gzip',
+    'xz': 'application/x-xz',
+}
+
+
+class RangeFile:
+    """Кусок файла для FileResponse. fileno отдаётся как есть, поэтому
+    wsgi.file_wrapper сервера (sendfile в gunicorn) шлёт кусок без
+    копирования, начиная с текущей позиции и по Content-Length."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Один диапазон из заголовка Range: (начало, конец включительно).
+    None — заголовок не разобран или диапазонов несколько, тогда
+    отдаётся весь файл. ValueError — диапазон вне файла."""
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-N: последние N байт.
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = part.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _precompressed(request, fullpath):
+    accepted = accepted_encodings(request)
+    for coding, suffix in PRECOMPRESSED:
+        if coding in accepted or '*' in accepted:
+            try:
+                info = os.stat(fullpath + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(info.st_mode):
+                return coding, suffix, info
+    return None
+
+
+def cache_control(response, name, max_age):
+    if HASHED_NAME.search(name):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+
+
+def serve(request, root, path, max_age=0, accel=None,
+          precompressed=False):
+    """Отдаёт файл из root с ETag, Last-Modified, Range и
+    Cache-Control. accel — ('nginx', префикс internal-локации) или
+    ('apache', None): тогда файл отдаёт фронтовый сервер по
+    X-Accel-Redirect или X-Sendfile, а здесь только заголовки.
+    С precompressed выбирается копия .br или .gz по Accept-Encoding."""
+    try:
+        fullpath = safe_join(root, path)
+        info = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('Файл не найден')
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404('Файл не найден')
+    coding, name = None, path
+    if precompressed:
+        variant = _precompressed(request, fullpath)
+        if variant is not None:
+            coding, suffix, info = variant
+            fullpath, name = fullpath + suffix, path + suffix
+    etag = quote_etag(f'{info.st_mtime_ns:x}-{info.st_size:x}')
+    last_modified = int(info.st_mtime)
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, fullpath, path, name, info,
+                                  etag, last_modified, accel)
+        if coding:
+            response['Content-Encoding'] = coding
+    if response.status_code in (200, 206, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        cache_control(response, path, max_age)
+        if precompressed:
+            patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _file_response(request, fullpath, path, name, info, etag,
+                   last_modified, accel):
+    # Тип по исходному имени: у копии .gz он тот же, что у оригинала.
+    content_type, encoding = mimetypes.guess_type(path)
+    # Как в FileResponse: архив не должен распаковываться браузером.
+    content_type = ENCODED_TYPES.get(encoding, content_type)
+    content_type = content_type or 'application/octet-stream'
+    if accel:
+        server, prefix = accel
+        response = HttpResponse(content_type=content_type)
+        if server == 'nginx':
+            response['X-Accel-Redirect'] = prefix + quote(name)
+        else:
+            response['X-Sendfile'] = fullpath
+        return response
+
+    size = info.st_size
+    file = open(fullpath, 'rb')
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and _if_range_matches(
+            request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(file, start, end - start + 1),
+            status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        size = end - start + 1
+    response['Content-Length'] = size
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def media_accel():
+    server = getattr(settings, 'MEDIA_ACCEL', '')
+    if not server:
+        return None
+    return server, getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+
+def media(request, path):
+    """Файлы MEDIA_ROOT. Имена с хэшем кэшируются навсегда, остальные
+    на MEDIA_CACHE_MAX_AGE секунд; с MEDIA_ACCEL = 'nginx' или
+    'apache' сами байты отдаёт фронтовый сервер."""
+    return serve(
+        request, settings.MEDIA_ROOT, path,
+        max_age=getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600),
+        accel=media_accel()
+    )
+
+
+def static(request, path):
+    """Файлы STATIC_ROOT после collectstatic: сжатые копии по
+    Accept-Encoding, имена с хэшем кэшируются на год как immutable."""
+    return serve(
+        request, settings.STATIC_ROOT, path,
+        max_age=getattr(settings, 'STATIC_CACHE_MAX_AGE', 3600),
+        precompressed=True
+    )
@@ -30,11 +30,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'posts.middleware.PerformanceMiddleware',
+    'posts.middleware.PageCacheMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -44,7 +46,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'posts.instrumentation.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -65,9 +67,26 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение переиспользуется между запросами одного потока.
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 20,
+        },
     }
 }
 
+# Выставляются каждому новому соединению SQLite (posts.sqlite).
+# WAL позволяет читать во время записи, synchronous=NORMAL в режиме
+# WAL не теряет целостность при сбое процесса.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'cache_size': -32000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -98,9 +117,27 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# collectstatic пишет имена с хэшем содержимого и копии .gz/.br,
+# их отдаёт yatube.files.static. Имена без хэша кэшируются
+# на STATIC_CACHE_MAX_AGE секунд.
+STATICFILES_STORAGE = 'yatube.storage.CompressedManifestStaticFilesStorage'
+STATIC_CACHE_MAX_AGE = 3600
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Медиа отдаёт yatube.files.media. Имена без хэша кэшируются на
+# MEDIA_CACHE_MAX_AGE секунд. MEDIA_ACCEL = 'nginx' (X-Accel-Redirect
+# на internal-локацию MEDIA_ACCEL_PREFIX) или 'apache' (X-Sendfile)
+# оставляет приложению только заголовки.
+MEDIA_CACHE_MAX_AGE = 3600
+MEDIA_ACCEL = os.environ.get('YATUBE_MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Сессии читаются из кэша, в базу идут только записи.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Сколько секунд пользователь авторизованного запроса живёт в кэше
+# (users.middleware.CachedAuthenticationMiddleware).
+AUTH_USER_CACHE_TIMEOUT = 300
 
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = 'index'
@@ -111,8 +148,83 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Общий для всех процессов сервера кэш в файле SQLite (yatube.cache).
+# В нём сессии и pickle, поэтому файл создаётся с правами 0600
+# в каталоге проекта, а не в общем /tmp.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'posts.instrumentation.InstrumentedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache.sqlite3')
+        ),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'BACKEND': 'yatube.cache.SQLiteCache',
+            'MAX_ENTRIES': 50000,
+            'MAX_BYTES': 256 * 1024 * 1024,
+        },
     }
 }
+
+# Фоновые задачи (posts.background) выполняются сразу в вызывающем
+# потоке, если True. Включается в тестах (yatube.settings_test).
+BACKGROUND_TASKS_SYNC = False
+
+# Посты автора, у которого подписчиков больше TIMELINE_FANOUT_LIMIT,
+# не раскладываются по лентам, а читаются при показе ленты подписок.
+# В ленту при подписке (и когда автор снова опускается до порога)
+# попадают только его последние TIMELINE_BACKFILL постов
+# (posts.timeline).
+TIMELINE_FANOUT_LIMIT = 5000
+TIMELINE_BACKFILL = 1000
+
+POST_THUMBNAIL_GEOMETRIES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+THUMBNAIL_WORKERS = 2
+
+POST_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_EDGE = 1920
+POST_IMAGE_QUALITY = 85
+POST_IMAGE_VARIANT_RATIO = (960, 339)
+POST_IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1920)
+POST_IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+
+# Сколько живёт страница в кэше для гостей, если её ленты
+# не менялись (posts.middleware.PageCacheMiddleware).
+PAGE_CACHE_TIMEOUT = 600
+
+# Сколько живут в кэше пользователь по username и группа по slug
+# и отметка о том, что такого объекта нет (posts.lookups).
+OBJECT_CACHE_TIMEOUT = 600
+OBJECT_CACHE_MISS_TIMEOUT = 60
+
+# Страницы лент в кэше (posts.cache.get_or_recompute): сколько секунд
+# значение свежее, сколько после этого ещё отдаётся, пока его
+# пересчитывает другой запрос, и за сколько до истечения
+# начинается фоновый пересчёт.
+FEED_CACHE_TIMEOUT = 300
+FEED_CACHE_GRACE = 60
+FEED_CACHE_REFRESH_AHEAD = 30
+
+# Запросы дольше этого порога пишутся в журнал yatube.slow_requests.
+SLOW_REQUEST_THRESHOLD_MS = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yatube.slow_requests': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,20 @@
+"""Настройки тестов: manage.py test --settings=yatube.settings_test
+и pytest (pytest.ini)."""
+from .settings import *  # noqa: F401,F403
+
+# Свой кэш в памяти процесса, чтобы flush и миграции тестовой базы
+# не трогали сессии и кэш сервера.
+CACHES = {
+    'default': {
+        'BACKEND': 'posts.instrumentation.InstrumentedCache',
+        'LOCATION': 'yatube-tests',
+        'OPTIONS': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'MAX_ENTRIES': 50000,
+        },
+    }
+}
+
+# База в памяти не ждёт чужих блокировок, поэтому фоновые задачи
+# выполняются сразу.
+BACKGROUND_TASKS_SYNC = True
@@ -0,0 +1,63 @@
+import gzip
+
+import brotli
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+COMPRESSIBLE = (
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml', '.html',
+    '.ico', '.ttf', '.otf', '.eot',
+)
+# Мельче этого сжатие не окупает лишний файл и заголовок Vary.
+MIN_SIZE = 256
+# Сжатая копия пишется, только если она заметно меньше оригинала.
+MIN_RATIO = 0.95
+
+
+# Суффикс сжатой копии и функция сжатия.
+COMPRESSORS = (
+    ('.br', brotli.compress),
+    ('.gz', lambda data: gzip.compress(data, 9, mtime=0)),
+)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который при collectstatic кладёт
+    рядом с файлами с хэшем в имени их копии .gz и .br.
+    Отдаёт их yatube.files.static по Accept-Encoding.
+
+    Файл, которого нет в манифесте (collectstatic ещё не запускали),
+    отдаётся по исходному имени, а не роняет страницу.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            for compressed in self.compress(name):
+                yield name, compressed, True
+
+    def compress(self, name):
+        if not name.lower().endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_SIZE:
+            return
+        for suffix, compress in COMPRESSORS:
+            compressed = compress(data)
+            if len(compressed) > len(data) * MIN_RATIO:
+                continue
+            path = name + suffix
+            if self.exists(path):
+                self.delete(path)
+            self._save(path, ContentFile(compressed))
+            yield path
@@ -1,26 +1,27 @@
 from django.conf import settings
 from django.conf.urls import handler404, handler500
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from . import files
 
 handler404 = "posts.views.page_not_found" # noqa
 handler500 = "posts.views.server_error" # noqa
 
 urlpatterns = [
+    re_path(
+        r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'),
+        files.media,
+        name='media'
+    ),
+    re_path(
+        r'^%s(?P<path>.+)$' % settings.STATIC_URL.lstrip('/'),
+        files.static,
+        name='static'
+    ),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('posts.urls')),
     path('admin/administrator/', admin.site.urls),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )
-    urlpatterns += static(
-        settings.STATIC_URL,
-        document_root=settings.STATIC_ROOT
-    )